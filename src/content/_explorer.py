@@ -3,15 +3,65 @@
 '''😌 NIST site content models for the CDE explorer.'''
 
 
-from wagtail.models import Page
-from django.db import models
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, HttpResponseForbidden
+from wagtail.models import Page, ReferenceIndex
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, models, transaction, IntegrityError
+from django.db.models.functions import Cast, Lower
+from ._exports import csv_chunks, json_chunks, xlsx_file
+from ._render import render_tree
+from .signals import cde_explorer_changed
+from ._snapshot import read_fragments, snapshot_path, write_snapshot
+from ._sources import get_source, SpreadsheetCache
+from ._tree import Tree, build_tree
+from ._workbook import Workbook
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, HttpResponseForbidden, JsonResponse, Http404
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.html import escape
+from django.utils.http import quote_etag
 from wagtail.admin.panels import FieldPanel
 from django.utils import timezone
-import gdown, tempfile, pandas, logging, dataclasses, traceback, os
+from django.utils.text import slugify
+from django.utils.safestring import mark_safe
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+import pandas, numpy, logging, dataclasses, traceback, hashlib, json, collections
 
 _logger = logging.getLogger(__name__)
 
+# Columns we expect in the "Structure" tab and in each object's tab, respectively
+_structure_columns = ('Object', 'Parent', 'Description', 'Stewardship')
+_attribute_columns = (
+    'Text', 'Definition', 'Requirement', 'Data Type', 'Explanatory Note', 'Permissible Values', 'Inheritance'
+)
+
+# Namespace for the PostgreSQL advisory locks we take on CDE explorer pages during imports
+_advisory_lock_class = 0x43444520  # "CDE "
+
+
+def _bulk_delete(queryset: models.QuerySet):
+    '''Delete everything in ``queryset`` with a single DELETE.
+
+    Django's ``QuerySet.delete`` collects every row so it can send ``post_delete``, which Wagtail
+    uses to clean up its reference index one row at a time. We skip that and clean up the reference
+    index for the whole set at once instead. Use this only on querysets whose dependent rows have
+    already been deleted.
+    '''
+    content_type = ContentType.objects.get_for_model(queryset.model)
+    str_pks = queryset.annotate(str_pk=Cast('pk', models.CharField())).values('str_pk')
+    ReferenceIndex.objects.filter(base_content_type=content_type, object_id__in=str_pks).delete()
+    return queryset._raw_delete(queryset.db)
+
+
+def _rows(mask: pandas.Series) -> str:
+    '''Tell the spreadsheet row numbers where ``mask`` is true, counting the header row as row 1.'''
+    return 'row(s) ' + ', '.join(str(index + 2) for index in mask[mask].index)
+
+
+def _digest(*values) -> str:
+    '''Make a content hash of ``values`` so we can tell if a stored row is out of date.'''
+    return hashlib.sha256(json.dumps(values, default=str).encode('utf-8')).hexdigest()
+
 
 @dataclasses.dataclass(order=True)
 class _Attribute:
@@ -25,16 +75,18 @@ class _Attribute:
     inheritance: bool
     def __hash__(self):
         return hash(self.text)
-    def instantiate(self, obj):
-        attr_obj = CDEExplorerAttribute(
-            text=self.text, definition=self.definition, required=self.required, data_type=self.data_type,
-            explanatory_note=self.explanatory_note, obj=obj, inheritance=self.inheritance
+    def digest(self) -> str:
+        return _digest(
+            self.text, self.definition, self.required, self.data_type, self.explanatory_note,
+            self.permissible_values, self.inheritance
+        )
+    def instantiate(self, obj_id, anchor: str, position: int, pk=None):
+        '''Make an unsaved Django attribute for ``obj_id``; its permissible values are made separately.'''
+        return CDEExplorerAttribute(
+            pk=pk, text=self.text, definition=self.definition, required=self.required, data_type=self.data_type,
+            explanatory_note=self.explanatory_note, obj_id=obj_id, inheritance=self.inheritance, anchor=anchor,
+            position=position, content_hash=self.digest()
         )
-        attr_obj.save()
-        for pv in self.permissible_values:
-            cde_pv = CDEPermissibleValue(value=pv, attribute=attr_obj)
-            cde_pv.save()
-        return attr_obj
 
 
 @dataclasses.dataclass(order=True)
@@ -47,16 +99,117 @@ class _Node:
     children: set[object] = dataclasses.field(default_factory=set, init=False, compare=False)
     def __hash__(self):
         return hash(self.name)
-    def instantiate(self, parent=None):
-        explorer_obj = CDEExplorerObject(
-            name=self.name, description=self.description, stewardship=self.stewardship, parent=parent
+    def digest(self) -> str:
+        return _digest(self.name, self.description, self.stewardship)
+    def instantiate(self, explorer, position: int, root=False, pk=None):
+        '''Make an unsaved Django object for this node in ``explorer``; links and attributes are made separately.'''
+        return CDEExplorerObject(
+            pk=pk, name=self.name, description=self.description, stewardship=self.stewardship,
+            page=explorer if root else None, explorer=explorer, position=position, content_hash=self.digest()
         )
-        explorer_obj.save()
-        for c in self.children:
-            c.instantiate(explorer_obj)
-        for a in self.attributes:
-            a.instantiate(explorer_obj)
-        return explorer_obj
+    def attribute_keys(self):
+        '''Yield each attribute of this node with a key that identifies it within the node.
+
+        The key is the attribute's text plus a count, in case the same text appears more than once.
+        '''
+        seen = collections.Counter()
+        for attr in self.attributes:
+            seen[attr.text] += 1
+            yield (attr.text, seen[attr.text]), attr
+
+
+def _closure(roots: list[_Node]) -> dict[str, list[tuple[_Node, int]]]:
+    '''Work out the closure of the trees at ``roots``.
+
+    For the name of every node at and beneath ``roots``, give that node and each of its descendants
+    in preorder, children in order of name, along with how many levels down each is (zero for the
+    node itself). A descendant reachable by several paths appears once, at its first occurrence, with
+    its shortest distance. Each node's list is made from its children's, so this works bottom-up
+    without recursion. The trees mustn't have cycles.
+    '''
+    orders, stack = {}, [(root, False) for root in sorted(roots, reverse=True)]
+    while stack:
+        node, expanded = stack.pop()
+        if node.name in orders: continue
+        children = sorted(node.children)
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children) if child.name not in orders)
+            continue
+        order = {node.name: (node, 0)}
+        for child in children:
+            for descendant, depth in orders[child.name]:
+                if descendant.name not in order or order[descendant.name][1] > depth + 1:
+                    order[descendant.name] = (descendant, depth + 1)
+        orders[node.name] = list(order.values())
+    return orders
+
+
+def _preorder(roots: list[_Node], closure: dict[str, list[tuple[_Node, int]]]) -> list[_Node]:
+    '''Get every distinct node at and beneath ``roots`` in preorder, roots in order of name.'''
+    nodes = {}
+    for root in sorted(roots):
+        for node, _ in closure[root.name]:
+            nodes.setdefault(node.name, node)
+    return list(nodes.values())
+
+
+def _anchors(nodes: list[_Node]) -> dict[tuple[str, tuple[str, int]], str]:
+    '''Make an HTML ID for every attribute of ``nodes`` that's unique among them all.
+
+    The keys are the name of the node plus the key from ``_Node.attribute_keys``. IDs come from the
+    node's name and the attribute's text; those that'd collide get a numeric suffix.
+    '''
+    anchors, taken = {}, set()
+    for node in nodes:
+        for key, attr in node.attribute_keys():
+            anchor = base = f'cde-{slugify(node.name)}-{slugify(attr.text)}'
+            suffix = 1
+            while anchor in taken:
+                suffix += 1
+                anchor = f'{base}-{suffix}'
+            taken.add(anchor)
+            anchors[(node.name, key)] = anchor
+    return anchors
+
+
+def _closure_rows(
+    closure: dict[str, list[tuple[_Node, int]]], pks: dict[str, int]
+) -> dict[tuple[int, int], tuple[int, int]]:
+    '''Turn ``closure`` into the closure table rows it needs, using ``pks`` to map node names to primary keys.
+
+    Each key is an ancestor and descendant primary key, and each value is the descendant's depth and
+    its position in the preorder of the ancestor's subtree.
+    '''
+    return {
+        (pks[name], pks[descendant.name]): (depth, position)
+        for name, order in closure.items() for position, (descendant, depth) in enumerate(order)
+    }
+
+
+def _find_cycle(nodes: dict[str, _Node]) -> list[str]:
+    '''Find a cycle of parents and children among ``nodes``, returning the names in it, or [] if there's none.'''
+    done, on_path = set(), set()
+    for start in nodes.values():
+        if start.name in done: continue
+        path, stack = [], [(start, iter(start.children))]
+        on_path.add(start.name)
+        path.append(start.name)
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                path.pop()
+                on_path.discard(node.name)
+                done.add(node.name)
+            elif child.name in on_path:
+                return path[path.index(child.name):] + [child.name]
+            elif child.name not in done:
+                stack.append((child, iter(child.children)))
+                on_path.add(child.name)
+                path.append(child.name)
+    return []
 
 
 class CDEExplorerPage(Page):
@@ -68,145 +221,729 @@ class CDEExplorerPage(Page):
     )
     # No need to include this in content_panels since it's machine-updated    
     update_log = models.TextField(null=False, blank=True, help_text='Log of how well the last update went')
+    last_import_checksum = models.CharField(
+        null=False, blank=True, max_length=64, help_text='Checksum of the spreadsheet last imported successfully'
+    )
+    cde_generation = models.PositiveIntegerField(
+        null=False, blank=True, default=0, help_text='Count of successful imports, for keying cached fragments'
+    )
 
     content_panels = Page.content_panels + [FieldPanel('spreadsheet_id')]
 
+    # Fields that imports update and that publishing an older revision mustn't roll back
+    _machine_fields = ('update_log', 'last_import_checksum', 'cde_generation')
+
+    def with_content_json(self, content):
+        obj = super().with_content_json(content)
+        for field in self._machine_fields:
+            setattr(obj, field, getattr(self, field))
+        return obj
+
     def get_context(self, request: HttpRequest, *args, **kwargs) -> dict:
         context = super().get_context(request, args, kwargs)
-        context['root_objects'] = self.root_objects.all().order_by('name')
+        snapshot = snapshot_path(self.pk, self.cde_generation, 'tree.json')
+        if default_storage.exists(snapshot):
+            context['cde_snapshot_url'] = default_storage.url(snapshot)
+        if request.GET.get('view') == 'all':
+            # Everything at once, rather than loading the tree a level at a time as it's opened
+            context['cde_fragments'] = self.fragments()
+        if request.user.is_staff or request.user.is_superuser:
+            context['import_job'] = self.current_import_job()
         return context
 
+    def current_import_job(self):
+        '''Get our most recently requested import job that's still queued or running, or None if there isn't one.'''
+        return self.import_jobs.filter(
+            status__in=(CDEImportJob.QUEUED, CDEImportJob.RUNNING)
+        ).order_by('-requested').first()
+
+    def load_tree(self) -> Tree:
+        '''Load all our CDE explorer objects, attributes, and permissible values into a tree in memory.
+
+        It takes four queries no matter how big the tree is: one for the objects along with their
+        parents, one for the attributes, one for the permissible values, and one for the attributes
+        each object inherits.
+        '''
+        return build_tree(
+            self.cde_objects.order_by('position').values(
+                'pk', 'name', 'description', 'stewardship', 'page_id', parent_id=models.F('parent_links__parent_id')
+            ),
+            CDEExplorerAttribute.objects.filter(obj__explorer=self).order_by('position', 'pk').values(
+                'pk', 'obj_id', 'anchor', 'text', 'definition', 'required', 'data_type', 'explanatory_note',
+                'inheritance'
+            ),
+            CDEPermissibleValue.objects.filter(attribute__obj__explorer=self).order_by('pk').values('attribute_id', 'value'),
+            CDEEffectiveAttribute.objects.filter(obj__explorer=self, depth__gt=0).order_by('position').values(
+                'obj_id', 'attribute_id', source_name=models.F('source__name')
+            )
+        )
+
+    def _fragment_key(self, generation: int) -> str:
+        return f'content.cde-explorer.{self.pk}.{generation}'
+
+    def fragments(self) -> dict[str, str]:
+        '''Get the rendered HTML of our tree and of our attribute canvases.
+
+        These change only when an import changes our objects, so they're cached under a key that
+        includes our import generation. Failing that, they come from our static snapshot, and only
+        failing that do we render them from the database. Once cached, showing the whole tree at once
+        (``?view=all``) needs nothing from the CDE explorer tables at all.
+        '''
+        key = self._fragment_key(self.cde_generation)
+        fragments = caches['state'].get(key)
+        if fragments is None:
+            fragments = read_fragments(self.pk, self.cde_generation) or render_tree(self.load_tree())
+            caches['state'].set(key, fragments, timeout=None)
+        return {name: mark_safe(html) for name, html in fragments.items()}
+
+    def publish_snapshot(self):
+        '''Render our tree afresh, cache it, and write it as a static snapshot for our current import generation.'''
+        tree = self.load_tree()
+        fragments = render_tree(tree)
+        caches['state'].set(self._fragment_key(self.cde_generation), fragments, timeout=None)
+        write_snapshot(self.pk, self.cde_generation, fragments, tree)
+
+    def _save_machine_fields(self):
+        '''Save just the fields imports own, leaving alone whatever editors published meanwhile.'''
+        fields = {field: getattr(self, field) for field in self._machine_fields}
+        CDEExplorerPage.objects.filter(pk=self.pk).update(**fields)
+
     def _log(self, message):
         '''Log a timestampped message to our update log and also to the _logger.'''
         _logger.warning(message)
         self.update_log += f'{timezone.now().isoformat(timespec="seconds")} {message}\n'
 
-    def _delete_obj(self, obj):
-        '''Delete all the CDE explorer objects at and beneath ``obj``.
+    def _report(self, phase: str, percent: int):
+        '''Tell whoever's watching the update that we're in ``phase`` and ``percent`` done.'''
+        progress = getattr(self, '_progress', None)
+        if progress is not None:
+            progress(phase, percent)
 
-        It deletes all child objects of ``obj``. It also deletes all the attributes of ``obj`` and
-        its children, plus all their permissible values.
+    def _stored_objects(self, *fields) -> list[dict]:
+        '''Get the given ``fields`` of every stored CDE explorer object of this page, in preorder.'''
+        return list(self.cde_objects.order_by('position').values('pk', *fields))
+
+    def _delete_objs(self, obj_ids: list[int]):
+        '''Delete the CDE explorer objects with ``obj_ids`` plus their links, attributes, and permissible values.
+
+        Call this inside a transaction.
+        '''
+        _bulk_delete(CDEEffectiveAttribute.objects.filter(
+            models.Q(obj_id__in=obj_ids) | models.Q(source_id__in=obj_ids)
+        ))
+        _bulk_delete(CDEPermissibleValue.objects.filter(attribute__obj_id__in=obj_ids))
+        _bulk_delete(CDEExplorerAttribute.objects.filter(obj_id__in=obj_ids))
+        _bulk_delete(CDEExplorerLink.objects.filter(models.Q(parent_id__in=obj_ids) | models.Q(child_id__in=obj_ids)))
+        _bulk_delete(CDEExplorerClosure.objects.filter(
+            models.Q(ancestor_id__in=obj_ids) | models.Q(descendant_id__in=obj_ids)
+        ))
+        _bulk_delete(CDEExplorerObject.objects.filter(pk__in=obj_ids))
+
+    def _purge_tree(self):
+        '''Delete all the CDE explorer objects of this page.
+
+        It also deletes all the attributes of those objects, plus all their permissible values.
+        Since every object knows the page it belongs to, there's no tree to walk: a handful of
+        set-based DELETEs remove the effective attributes, permissible values, attributes, links,
+        closure, and objects. Call this inside a transaction.
+        '''
+        _bulk_delete(CDEEffectiveAttribute.objects.filter(obj__explorer=self))
+        _bulk_delete(CDEPermissibleValue.objects.filter(attribute__obj__explorer=self))
+        _bulk_delete(CDEExplorerAttribute.objects.filter(obj__explorer=self))
+        _bulk_delete(CDEExplorerLink.objects.filter(child__explorer=self))
+        _bulk_delete(CDEExplorerClosure.objects.filter(descendant__explorer=self))
+        count = _bulk_delete(CDEExplorerObject.objects.filter(explorer=self))
+        self._log(f'Deleted {count} objects')
+
+    def _install_attributes(self, pending: list[tuple[_Attribute, int, str, int]]) -> tuple[int, int]:
+        '''Bulk-insert the attributes in ``pending`` along with their permissible values.
+
+        Each item in ``pending`` is a temporary attribute, the primary key of the object it goes
+        with, its anchor, and its place among the object's attributes. Return the number of
+        attributes and permissible values inserted.
+        '''
+        attr_objs = CDEExplorerAttribute.objects.bulk_create([
+            attr.instantiate(obj_id, anchor, position) for attr, obj_id, anchor, position in pending
+        ])
+        pvs = CDEPermissibleValue.objects.bulk_create([
+            CDEPermissibleValue(value=pv, attribute=attr_obj)
+            for (attr, _, _, _), attr_obj in zip(pending, attr_objs) for pv in attr.permissible_values
+        ])
+        return len(attr_objs), len(pvs)
+
+    def _install(
+        self, nodes: list[_Node], root_names: set[str], positions: dict[str, int], anchors: dict
+    ) -> dict[str, int]:
+        '''Install ``nodes`` as new CDE explorer objects of this page, along with their attributes.
+
+        Those whose names are in ``root_names`` become our root objects, ``positions`` gives each
+        one's place in the preorder of the whole page, and ``anchors`` the HTML IDs of their
+        attributes. Rather than saving each object, attribute, and permissible value one at a time,
+        each kind goes in with a single bulk insert, so the number of writes doesn't grow with the
+        number of rows. Linking the new objects to their parents and children is up to the caller.
+        Return a mapping from the names of the new objects to their primary keys.
+        '''
+        explorer_objs = CDEExplorerObject.objects.bulk_create([
+            node.instantiate(self, positions[node.name], node.name in root_names) for node in nodes
+        ])
+        total_attrs, total_pvs = self._install_attributes([
+            (attr, explorer_obj.pk, anchors[(node.name, key)], position)
+            for node, explorer_obj in zip(nodes, explorer_objs)
+            for position, (key, attr) in enumerate(node.attribute_keys())
+        ])
+        self._log(f'Installed {len(explorer_objs)} objects, {total_attrs} attributes, and {total_pvs} permissible values')
+        return {explorer_obj.name: explorer_obj.pk for explorer_obj in explorer_objs}
+
+    def _rebuild(self, roots: list[_Node]):
+        '''Drop all our CDE explorer objects and install the trees at ``roots`` from scratch.
+
+        Call this inside a transaction.
+        '''
+        self._log('Deleting all old explorer objects')
+        self._purge_tree()
+        self._log('Installing new explorer objects')
+        closure = _closure(roots)
+        nodes = _preorder(roots, closure)
+        pks = self._install(
+            nodes, {root.name for root in roots}, {node.name: i for i, node in enumerate(nodes)}, _anchors(nodes)
+        )
+        links = CDEExplorerLink.objects.bulk_create([
+            CDEExplorerLink(parent_id=pks[node.name], child_id=pks[child.name]) for node in nodes for child in node.children
+        ])
+        closure = CDEExplorerClosure.objects.bulk_create([
+            CDEExplorerClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth, position=position)
+            for (ancestor, descendant), (depth, position) in _closure_rows(closure, pks).items()
+        ])
+        self._log(f'Linked them with {len(links)} links and {len(closure)} closure rows')
+        self._resolve_inheritance()
+
+    def _sync(self, roots: list[_Node]):
+        '''Bring the stored CDE explorer objects of this page in line with the trees at ``roots``.
+
+        Instead of dropping everything and starting over, we identify each object by its name,
+        each attribute by its object plus its text, and each link or closure row by the names at
+        either end. Then we compare the content hashes of what's in the spreadsheet with what's stored and
+        insert, update, or delete only what differs. Unchanged rows keep their primary keys, and
+        the amount of writing tracks the size of the edit rather than the size of the dictionary.
+        Call this inside a transaction.
+        '''
+        # Catalog what's stored
+        stored_objs, doomed_objs = {}, set()
+        for row in self._stored_objects('name', 'content_hash', 'page_id', 'position'):
+            if row['name'] in stored_objs:
+                # Duplicates (from before objects could have several parents) can't be told apart, so they go
+                doomed_objs.add(row['pk'])
+            else:
+                stored_objs[row['name']] = row
+        names = {row['pk']: name for name, row in stored_objs.items()}
+        stored_attrs, counts = collections.defaultdict(dict), collections.Counter()
+        attr_rows = CDEExplorerAttribute.objects.filter(obj_id__in=list(names)).order_by('position', 'pk')
+        for row in attr_rows.values('pk', 'obj_id', 'text', 'anchor', 'position', 'content_hash'):
+            counts[(row['obj_id'], row['text'])] += 1
+            stored_attrs[row['obj_id']][(row['text'], counts[(row['obj_id'], row['text'])])] = row
+
+        # Compare the spreadsheet against it
+        closure = _closure(roots)
+        nodes, root_names = _preorder(roots, closure), {root.name for root in roots}
+        positions, anchors = {node.name: i for i, node in enumerate(nodes)}, _anchors(nodes)
+        new_nodes, changed_objs, new_attrs, changed_attrs, doomed_attrs = [], [], [], [], []
+        for node in nodes:
+            row = stored_objs.pop(node.name, None)
+            if row is None:
+                new_nodes.append(node)
+                continue
+            is_root = node.name in root_names
+            if (
+                row['content_hash'] != node.digest() or (row['page_id'] is not None) != is_root
+                or row['position'] != positions[node.name]
+            ):
+                changed_objs.append(node.instantiate(self, positions[node.name], is_root, pk=row['pk']))
+            attrs = stored_attrs.pop(row['pk'], {})
+            for position, (key, attr) in enumerate(node.attribute_keys()):
+                attr_row, anchor = attrs.pop(key, None), anchors[(node.name, key)]
+                if attr_row is None:
+                    new_attrs.append((attr, row['pk'], anchor, position))
+                elif (
+                    attr_row['content_hash'] != attr.digest() or attr_row['anchor'] != anchor
+                    or attr_row['position'] != position
+                ):
+                    changed_attrs.append((attr, attr.instantiate(row['pk'], anchor, position, pk=attr_row['pk'])))
+            doomed_attrs.extend(attr_row['pk'] for attr_row in attrs.values())
+        doomed_objs.update(row['pk'] for row in stored_objs.values())
+
+        # Apply the differences to the objects and attributes
+        self._delete_objs(list(doomed_objs))
+        _bulk_delete(CDEEffectiveAttribute.objects.filter(attribute_id__in=doomed_attrs))
+        _bulk_delete(CDEPermissibleValue.objects.filter(attribute_id__in=doomed_attrs))
+        _bulk_delete(CDEExplorerAttribute.objects.filter(pk__in=doomed_attrs))
+        CDEExplorerObject.objects.bulk_update(
+            changed_objs, ['description', 'stewardship', 'page', 'position', 'content_hash']
+        )
+        CDEExplorerAttribute.objects.bulk_update(
+            [attr_obj for _, attr_obj in changed_attrs],
+            ['definition', 'required', 'data_type', 'explanatory_note', 'inheritance', 'anchor', 'position', 'content_hash']
+        )
+        _bulk_delete(CDEPermissibleValue.objects.filter(attribute_id__in=[attr_obj.pk for _, attr_obj in changed_attrs]))
+        CDEPermissibleValue.objects.bulk_create([
+            CDEPermissibleValue(value=pv, attribute=attr_obj)
+            for attr, attr_obj in changed_attrs for pv in attr.permissible_values
+        ])
+        self._log(
+            f'Sync: {len(changed_objs)} objects and {len(changed_attrs)} attributes updated; '
+            f'{len(doomed_objs)} objects and {len(doomed_attrs)} attributes deleted'
+        )
+        new_attrs_count, new_pvs_count = self._install_attributes(new_attrs)
+        self._log(f'Sync: {new_attrs_count} attributes with {new_pvs_count} permissible values added to existing objects')
+        pks = {name: pk for pk, name in names.items() if pk not in doomed_objs}
+        pks.update(self._install(new_nodes, root_names, positions, anchors))
+
+        # Finally, the links and closure between them
+        wanted = {(pks[node.name], pks[child.name]) for node in nodes for child in node.children}
+        doomed_links = []
+        for link in CDEExplorerLink.objects.filter(child_id__in=list(pks.values())).values('pk', 'parent_id', 'child_id'):
+            key = (link['parent_id'], link['child_id'])
+            if key in wanted:
+                wanted.discard(key)
+            else:
+                doomed_links.append(link['pk'])
+        _bulk_delete(CDEExplorerLink.objects.filter(pk__in=doomed_links))
+        CDEExplorerLink.objects.bulk_create([CDEExplorerLink(parent_id=parent, child_id=child) for parent, child in wanted])
+        self._log(f'Sync: {len(wanted)} links added and {len(doomed_links)} deleted')
+        wanted, changed_rows, doomed_rows = _closure_rows(closure, pks), [], []
+        for row in CDEExplorerClosure.objects.filter(descendant__explorer=self).values(
+            'pk', 'ancestor_id', 'descendant_id', 'depth', 'position'
+        ):
+            depth_position = wanted.pop((row['ancestor_id'], row['descendant_id']), None)
+            if depth_position is None:
+                doomed_rows.append(row['pk'])
+            elif depth_position != (row['depth'], row['position']):
+                changed_rows.append(CDEExplorerClosure(pk=row['pk'], depth=depth_position[0], position=depth_position[1]))
+        _bulk_delete(CDEExplorerClosure.objects.filter(pk__in=doomed_rows))
+        CDEExplorerClosure.objects.bulk_update(changed_rows, ['depth', 'position'])
+        CDEExplorerClosure.objects.bulk_create([
+            CDEExplorerClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth, position=position)
+            for (ancestor, descendant), (depth, position) in wanted.items()
+        ])
+        self._log(
+            f'Sync: {len(wanted)} closure rows added, {len(changed_rows)} updated, and {len(doomed_rows)} deleted'
+        )
+        self._resolve_inheritance()
+
+    def _resolve_inheritance(self):
+        '''Work out the effective attributes of each of our objects and store them.
+
+        An object's effective attributes are its own, followed by every attribute marked for
+        inheritance on an object above it, unless the object already has one with the same text.
+        When several ancestors pass down the same text, the nearest wins, and among equally near
+        ones, the first in preorder. Like the closure, the stored rows are compared against the
+        wanted ones so only what differs gets written. Call this inside a transaction, after the
+        objects, attributes, and closure are in place.
         '''
-        for attr in obj.attributes.all():
-            for pv in attr.permissible_values.all():
-                pv.delete()
-            attr.delete()
-        for child in obj.children.all():
-            self._delete_obj(child)
-        obj.delete()
-
-    def _read_sheet(self, url):
-        '''Read the spreadsheet at ``url`` and return it.'''
-        fd, fn = tempfile.mkstemp('.xlsx')
-        os.close(fd)
-        self._log(f'Downloading {self.spreadsheet_id} from Gdrive')
-        # use_cookies must be False to work on tumor.jpl.nasa.gov
-        fn = gdown.download(id=self.spreadsheet_id, output=fn, quiet=True, use_cookies=False, format='xlsx')
-        # gdown doesn't raise an exception on error, but returns None as the filename—even when we pass
-        # in the filename we want to use; see wkentaro/gdown#276
-        if fn is None:
-            raise ValueError('Error reading from gdown; check console log as gdown does not pass this info along')
-        return fn
-
-    def _parse_attributes(self, name, sheet):
-        '''Using the data in ``sheet``, find the tab ``name`` and get all the attributes there.'''
-        self._log(f'Parsing attributes in tab "{name}"')
-
-        frame = sheet[name]
-        row_number, attrs = 0, []
-        for text in frame['Text']:
-            # Gather data from the spreadsheet tab
-            pvs_text, defn = frame['Permissible Values'][row_number], frame['Definition'][row_number]
-            req, dt = frame['Requirement'][row_number], frame['Data Type'][row_number]
-            note, inheritance = frame['Explanatory Note'][row_number], frame['Inheritance'][row_number]
-
-            # Handle the empty cells
-            pvs  = [] if pandas.isna(pvs_text) else [i.strip() for i in pvs_text.split('\n')]
-            defn = '' if pandas.isna(defn) else defn
-            req  = '' if pandas.isna(req) else req
-            dt   = '' if pandas.isna(dt) else dt
-            note = '' if pandas.isna(note) else note
-            inh  = False if pandas.isna(inheritance) else inheritance
-
-            # Create the temporary attribute and add it to the sequence
-            attrs.append(_Attribute(text, defn, req, dt, note, pvs, inh))
-            row_number += 1
+        positions = {row['pk']: row['position'] for row in self._stored_objects('position')}
+        own, inheriting = collections.defaultdict(list), collections.defaultdict(list)
+        attr_rows = CDEExplorerAttribute.objects.filter(obj__explorer=self).order_by('position', 'pk')
+        for pk, obj_id, text, inheritance, position in attr_rows.values_list(
+            'pk', 'obj_id', 'text', 'inheritance', 'position'
+        ):
+            own[obj_id].append((pk, text))
+            if inheritance: inheriting[obj_id].append((pk, text, position))
+
+        # For each object beneath one that passes attributes down, the best candidate for each text
+        inherited = collections.defaultdict(dict)
+        closure_rows = CDEExplorerClosure.objects.filter(ancestor_id__in=list(inheriting), depth__gt=0)
+        for ancestor, descendant, depth in closure_rows.values_list('ancestor_id', 'descendant_id', 'depth'):
+            candidates = inherited[descendant]
+            for pk, text, position in inheriting[ancestor]:
+                rank = (depth, positions[ancestor], position)
+                if text not in candidates or candidates[text][0] > rank: candidates[text] = (rank, pk, ancestor)
+        wanted = {}
+        for obj_id in positions:
+            attrs = own.get(obj_id, [])
+            for position, (pk, _) in enumerate(attrs):
+                wanted[(obj_id, pk)] = (obj_id, 0, position)
+            texts = {text for _, text in attrs}
+            passed_down = sorted(
+                candidate for text, candidate in inherited.get(obj_id, {}).items() if text not in texts
+            )
+            for position, ((depth, _, _), pk, source) in enumerate(passed_down, len(attrs)):
+                wanted[(obj_id, pk)] = (source, depth, position)
+
+        changed_rows, doomed_rows = [], []
+        for row in CDEEffectiveAttribute.objects.filter(obj__explorer=self).values(
+            'pk', 'obj_id', 'attribute_id', 'source_id', 'depth', 'position'
+        ):
+            effective = wanted.pop((row['obj_id'], row['attribute_id']), None)
+            if effective is None:
+                doomed_rows.append(row['pk'])
+            elif effective != (row['source_id'], row['depth'], row['position']):
+                changed_rows.append(CDEEffectiveAttribute(
+                    pk=row['pk'], source_id=effective[0], depth=effective[1], position=effective[2]
+                ))
+        _bulk_delete(CDEEffectiveAttribute.objects.filter(pk__in=doomed_rows))
+        CDEEffectiveAttribute.objects.bulk_update(changed_rows, ['source', 'depth', 'position'])
+        CDEEffectiveAttribute.objects.bulk_create([
+            CDEEffectiveAttribute(obj_id=obj_id, attribute_id=pk, source_id=source, depth=depth, position=position)
+            for (obj_id, pk), (source, depth, position) in wanted.items()
+        ])
+        self._log(
+            f'Effective attributes: {len(wanted)} added, {len(changed_rows)} updated, and {len(doomed_rows)} deleted'
+        )
+
+    def _read_sheet(self) -> tuple[str, str]:
+        '''Fetch our spreadsheet into the local cache; return its filename and checksum.'''
+        source = get_source()
+        self._log(f'Downloading {self.spreadsheet_id} from {source.__class__.__name__}')
+        return SpreadsheetCache().fetch(source, self.spreadsheet_id)
+
+    def _parse_attributes(self, names, sheet: Workbook) -> dict[str, list[_Attribute]]:
+        '''Using the data in ``sheet``, get all the attributes in the tabs with the given ``names``.
+
+        Rather than going cell by cell, we stack the columns we need from every tab into a single
+        frame and clean up each column in one go. Each tab is read only when we get to it.
+        '''
+        self._log(f'Parsing attributes in {len(names)} tabs')
+        blocks, tabs, rows = [], [], []
+        for name in names:
+            values, row_numbers = sheet.columns(name, _attribute_columns)
+            blocks.append(values)
+            tabs.append(numpy.full(len(values), name, dtype=object))
+            rows.append(row_numbers)
+        if not blocks: return {}
+        frame = pandas.DataFrame(numpy.vstack(blocks), columns=_attribute_columns)
+        tabs, rows = numpy.concatenate(tabs), numpy.concatenate(rows)
+
+        blanks = frame['Text'].isna().to_numpy()
+        if blanks.any():
+            where = ', '.join(f'tab "{tab}" row {row}' for tab, row in zip(tabs[blanks], rows[blanks]))
+            raise ValueError(f'No "Text" in {where}')
+
+        # Handle the empty cells a column at a time
+        frame = frame.fillna({
+            'Definition': '', 'Requirement': '', 'Data Type': '', 'Explanatory Note': '', 'Permissible Values': '',
+            'Inheritance': False
+        })
+        pvs = frame['Permissible Values'].astype(str).str.split('\n')
+
+        # Create the temporary attributes in one pass over the rows, grouping them by tab
+        attrs = {name: [] for name in names}
+        columns = [frame[column] for column in _attribute_columns if column != 'Permissible Values']
+        for tab, (text, defn, req, dt, note, inh), values in zip(tabs, zip(*columns), pvs):
+            values = [value.strip() for value in values if value.strip()]
+            attrs[tab].append(_Attribute(text, defn, req, dt, note, values, inh))
         return attrs
 
-    def _parse_structure(self, sheet):
+    def _parse_structure(self, sheet: Workbook):
         '''Using the data ``sheet``, produce a sequence of tree structure that match.'''
 
-        # First, catalog all the nodes and ensure they all have tabs
+        # First, make sure the "Structure" tab makes sense and references only tabs we have
         self._log('Parsing overall structure in the "Structure" tab and looking for referenced tabs')
-        row_number, nodes, roots, structure = 0, {}, [], sheet['Structure']
-        for name in structure['Object']:
-            description, stewardship = structure['Description'][row_number], structure['Stewardship'][row_number]
-            attributes = self._parse_attributes(name, sheet)
-            stewardship = '' if pandas.isna(stewardship) else stewardship
-            nodes[name] = _Node(name, description, stewardship, attributes)
-            row_number += 1
-
-        # Now connect parents to children and gather the roots
+        if 'Structure' not in sheet:
+            raise ValueError('The spreadsheet has no "Structure" tab')
+        structure = sheet.frame('Structure', _structure_columns)
+        names = structure['Object']
+        parents = structure['Parent'].fillna('').astype(str).str.split(',').map(
+            lambda parents: [parent.strip() for parent in parents if parent.strip()]
+        )
+        known = set(names.dropna())
+        problems = [
+            (names.isna(), 'no "Object"'),
+            (names.duplicated() & names.notna(), 'a repeated "Object"'),
+            (names.notna() & ~names.isin(sheet.names), 'an "Object" with no tab of its own'),
+            (parents.map(lambda parents: not known.issuperset(parents)), 'a "Parent" that is not an "Object"'),
+        ]
+        problems = [f'{problem} in {_rows(mask)}' for mask, problem in problems if mask.any()]
+        if problems:
+            raise ValueError(f'Tab "Structure" has {"; ".join(problems)}')
+
+        # Next, catalog all the nodes with their attributes
+        self._report('Parsing', 40)
+        nodes, roots, attributes = {}, [], self._parse_attributes(list(names), sheet)
+        descriptions, stewardships = structure['Description'].fillna(''), structure['Stewardship'].fillna('')
+        for name, description, stewardship in zip(names, descriptions, stewardships):
+            nodes[name] = _Node(name, description, stewardship, attributes[name])
+
+        # Now connect parents to children and gather the roots. An object with several parents is
+        # shared by all of them rather than copied beneath each, so there mustn't be any cycles.
         self._log('Connecting child objects to parents')
-        row_number = 0
-        for name in structure['Object']:
+        for name, parent_names in zip(names, parents):
             node = nodes[name]
-            parents = structure['Parent'][row_number]
-            if pandas.isna(parents):
+            if not parent_names:
                 roots.append(node)
             else:
-                # This handles multiple parents? What does that even mean?
-                for parent_name in [i.strip() for i in parents.split(',')]:
-                    parent = nodes[parent_name]
-                    parent.children.add(node)
-            row_number += 1
+                for parent_name in parent_names:
+                    nodes[parent_name].children.add(node)
+        cycle = _find_cycle(nodes)
+        if cycle:
+            raise ValueError(f'Tab "Structure" has objects that are their own ancestors: {" → ".join(cycle)}')
 
         # Tell the roots
         self._log(f'Total root objects: {len(roots)}: {", ".join([i.name for i in roots])}')
         return roots
 
-    def update_nodes(self):
+    def update_nodes(self, rebuild=False, progress=None):
         '''Update the CDE nodes of this page.
 
-        ⚠️ Not re-entrant!
+        Normally this syncs the stored objects with the spreadsheet, touching only what changed.
+        With ``rebuild`` set, it drops every stored object and installs the spreadsheet from
+        scratch instead. If given, ``progress`` gets called with the name of each phase of the
+        update and the percent complete.
+
+        ⚠️ Not re-entrant! Web requests should use ``CDEImportJob.enqueue`` instead so that the
+        ``nist_help_cde_worker`` command runs the update under a lock on this page.
         '''
-        self.update_log = ''
-        self.save()
+        self.update_log, self._progress = '', progress
+        self._save_machine_fields()
 
         # Read the sheet, build the pseudo-structures
         try:
             self._log(f'Reading spreadsheet {self.spreadsheet_id}')
-            sheet_filename = self._read_sheet(self.spreadsheet_id)
-            sheet = pandas.read_excel(sheet_filename, sheet_name=None)
-            roots = self._parse_structure(sheet)
-
-            # At this point, the data in the sheet passes muster, so we drop the old objects and
-            # instantiate the new
-            self._log('Deleting all old explorer objects')
-            for root in self.root_objects.all():
-                self._delete_obj(root)
-            self._log('Installing new explorer objects')
-            for root in roots:
-                explorer_obj = root.instantiate()
-                explorer_obj.page = self
-                explorer_obj.save()
+            self._report('Downloading', 0)
+            sheet_filename, checksum = self._read_sheet()
+            if checksum == self.last_import_checksum and not rebuild:
+                self._log(f'Spreadsheet unchanged since the last import (checksum {checksum}); nothing to do')
+                self._save_machine_fields()
+                return self.url
+            self._report('Reading', 20)
+            with Workbook(sheet_filename) as sheet:
+                roots = self._parse_structure(sheet)
+
+            # At this point, the data in the sheet passes muster, so we bring the stored objects in
+            # line with it—all in one transaction so a failure leaves the old tree in place
+            self._report('Saving', 70)
+            with transaction.atomic():
+                if rebuild:
+                    self._rebuild(roots)
+                else:
+                    self._log('Syncing explorer objects with the spreadsheet')
+                    self._sync(roots)
 
         except Exception as ex:
             self._log(f'Exception {ex.__class__.__name__}; aborting update')
             self._log(traceback.format_exc())
             _logger.exception('Abort')
-            self.save()
-            return self.url
+            self._save_machine_fields()
+            raise
+
+        finally:
+            self._progress = None
 
+        self.last_import_checksum = checksum
+        self.next_generation()
         self._log('Saving and done!')
-        self.save()
+        self._save_machine_fields()
         return self.url
 
+    def next_generation(self):
+        '''Move on to a new import generation now that our CDEs have changed.
+
+        That retires the cached fragments, snapshot, and JSON ETags of the old generation; we render
+        the new one's straight away so visitors don't have to wait for it.
+        '''
+        self.cde_generation += 1
+        self._save_machine_fields()
+        self._log('Rendering the explorer and writing its snapshot')
+        try:
+            self.publish_snapshot()
+        except Exception as ex:
+            # The CDEs themselves are fine, and the page can still render from the database
+            self._log(f'Exception {ex.__class__.__name__} while writing the snapshot: {ex}')
+            _logger.exception('Snapshot')
+        caches['state'].delete(self._fragment_key(self.cde_generation - 1))
+        cde_explorer_changed.send(sender=CDEExplorerPage, page=self)
+
+    def _serve_progress(self, request: HttpRequest) -> HttpResponse:
+        '''Tell how the import job shown on this page is getting along; once it's done, there's none.'''
+        job = self.current_import_job()
+        if job is None:
+            return JsonResponse({'status': None})
+        return JsonResponse(job.as_dict())
+
+    def _serve_json(self, request: HttpRequest, build) -> HttpResponse:
+        '''Respond with the JSON that calling ``build`` makes, unless the client already has it.
+
+        Our CDE data changes only with each import, so the ETag is just our import generation plus
+        the query. Clients must still check back each time, but usually get a 304 for their trouble.
+        '''
+        etag = quote_etag(f'{self.pk}-{self.cde_generation}-{_digest(sorted(request.GET.items()))[:16]}')
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(build(), safe=False)
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def _children_json(self, node_id: str) -> list[dict]:
+        '''Describe the children of the tree node ``node_id`` in the form jstree wants.
+
+        Node ``#`` is the very top, whose children are our roots. Since an object can appear under
+        several parents, each tree node's ID is the path of object primary keys leading to it,
+        separated by dots; the last one is the object we're after.
+        '''
+        if node_id == '#':
+            objs, prefix = self.root_objects.all(), ''
+        else:
+            try:
+                objs, prefix = self.cde_objects.filter(parent_links__parent_id=int(node_id.split('.')[-1])), f'{node_id}.'
+            except ValueError:
+                raise Http404('No such node')
+        objs = objs.annotate(
+            has_children=models.Exists(CDEExplorerLink.objects.filter(parent_id=models.OuterRef('pk')))
+        ).order_by('name').values('pk', 'name', 'has_children')
+        return [
+            {'id': f'{prefix}{row["pk"]}', 'text': escape(row['name']), 'children': row['has_children']}
+            for row in objs
+        ]
+
+    def _node_json(self, pk: str) -> dict:
+        '''Describe the CDE explorer object with primary key ``pk`` along with its attributes.
+
+        Its own attributes are in ``attributes`` and those it inherits from objects above it, each
+        with the name of the object it comes from, in ``inherited``.
+        '''
+        obj = self.cde_objects.filter(pk=pk).values('name', 'description', 'stewardship').first() if pk.isdigit() else None
+        if obj is None: raise Http404('No such object')
+        obj['attributes'], obj['inherited'] = [], []
+        rows = CDEEffectiveAttribute.objects.filter(obj_id=pk).order_by('position').values(
+            'depth', source_name=models.F('source__name'), anchor=models.F('attribute__anchor'),
+            text=models.F('attribute__text'), required=models.F('attribute__required'),
+            inheritance=models.F('attribute__inheritance')
+        )
+        for row in rows:
+            depth, source = row.pop('depth'), row.pop('source_name')
+            row['required'] = row['required'] == 'Required'
+            if depth == 0:
+                obj['attributes'].append(row)
+            else:
+                obj['inherited'].append(dict(row, source=source))
+        return obj
+
+    def _attribute_json(self, anchor: str) -> dict:
+        '''Describe the attribute whose anchor is ``anchor`` along with its permissible values.'''
+        attribute = CDEExplorerAttribute.objects.filter(obj__explorer=self, anchor=anchor).values(
+            'pk', 'text', 'definition', 'required', 'data_type', 'explanatory_note', 'inheritance'
+        ).first()
+        if attribute is None: raise Http404('No such attribute')
+        pvs = CDEPermissibleValue.objects.filter(attribute_id=attribute.pop('pk')).order_by('pk')
+        attribute['permissible_values'] = list(pvs.values_list('value', flat=True))
+        return attribute
+
+    def _ancestor_paths(self, obj_ids: set[int]) -> dict[int, list[tuple[int, str]]]:
+        '''Find a path from a root down to each of the objects in ``obj_ids``.
+
+        Each path is a list of the primary keys and names of the objects along it, ending with the
+        object itself. Where an object has several parents, we follow the one that comes first in the
+        preorder of this page. It takes two queries: one for all the ancestors, via the closure, and
+        one for the links among them.
+        '''
+        rows = CDEExplorerClosure.objects.filter(descendant_id__in=obj_ids).values_list(
+            'ancestor_id', 'ancestor__name', 'ancestor__position'
+        )
+        ancestors = {pk: (name, position) for pk, name, position in rows}
+        parents = {}
+        for parent, child in CDEExplorerLink.objects.filter(
+            child_id__in=list(ancestors), parent_id__in=list(ancestors)
+        ).values_list('parent_id', 'child_id'):
+            if child not in parents or ancestors[parent][1] < ancestors[parents[child]][1]:
+                parents[child] = parent
+        paths = {}
+        for obj_id in obj_ids:
+            path, pk = [], obj_id
+            while pk is not None:
+                path.append((pk, ancestors[pk][0]))
+                pk = parents.get(pk)
+            paths[obj_id] = path[::-1]
+        return paths
+
+    def search(self, query: str, limit: int = 50) -> list[dict]:
+        '''Search the names of our objects, the text and definitions of their attributes, and permissible values.
+
+        Every word in ``query`` has to appear, ignoring case, in the same name, text, definition, or
+        value. Hits are ranked by how well they match (the whole thing, the start, or just somewhere
+        inside) and then by what matched: names, attribute text, permissible values, and definitions,
+        in that order. On PostgreSQL the matching uses trigram indexes; elsewhere it's a plain scan.
+        Each hit comes with the path of objects leading down to it.
+        '''
+        words = query.lower().split()
+        if not words: return []
+        phrase = ' '.join(words)
+
+        def matching(queryset, field: str, weight: int) -> models.QuerySet:
+            folded = f'{field}_folded'
+            return queryset.annotate(**{folded: Lower(field)}).filter(
+                *[models.Q(**{f'{folded}__contains': word}) for word in words]
+            ).annotate(score=models.Case(
+                models.When(**{folded: phrase}, then=30 + weight),
+                models.When(**{f'{folded}__startswith': phrase}, then=20 + weight),
+                default=10 + weight
+            )).order_by('-score', field)
+
+        attributes = CDEExplorerAttribute.objects.filter(obj__explorer=self)
+        pvs = CDEPermissibleValue.objects.filter(attribute__obj__explorer=self)
+        F, hits = models.F, []
+        for kind, queryset, field, weight, columns in (
+            ('object', self.cde_objects.all(), 'name', 3, dict(hit_obj=F('pk'), hit_name=F('name'))),
+            ('attribute', attributes, 'text', 2, dict(hit_obj=F('obj_id'), hit_name=F('obj__name'), hit_anchor=F('anchor'))),
+            ('value', pvs, 'value', 1, dict(
+                hit_obj=F('attribute__obj_id'), hit_name=F('attribute__obj__name'), hit_anchor=F('attribute__anchor')
+            )),
+            ('definition', attributes, 'definition', 0, dict(
+                hit_obj=F('obj_id'), hit_name=F('obj__name'), hit_anchor=F('anchor')
+            )),
+        ):
+            for row in matching(queryset, field, weight).values('score', field, **columns)[:limit]:
+                hits.append(dict(
+                    kind=kind, score=row['score'], text=row[field], obj_id=row['hit_obj'], object=row['hit_name'],
+                    anchor=row.get('hit_anchor')
+                ))
+        hits.sort(key=lambda hit: (-hit['score'], hit['object'], hit['text']))
+        hits = hits[:limit]
+        paths = self._ancestor_paths({hit['obj_id'] for hit in hits}) if hits else {}
+        return [{
+            'kind': hit['kind'],
+            'text': hit['text'][:200],
+            'object': hit['object'],
+            'attribute': hit['anchor'],
+            'node': '.'.join(str(pk) for pk, _ in paths[hit['obj_id']]),
+            'path': [name for _, name in paths[hit['obj_id']]]
+        } for hit in hits]
+
+    def _serve_download(self, kind: str) -> HttpResponse:
+        '''Stream our whole dictionary as a ``kind`` of file: ``json``, ``csv``, or ``xlsx``.'''
+        fn_prefix = slugify(self.title)
+        if kind == 'json':
+            response = StreamingHttpResponse(json_chunks(self), content_type='application/json')
+        elif kind == 'csv':
+            response = StreamingHttpResponse(csv_chunks(self), content_type='text/csv')
+        elif kind == 'xlsx':
+            # Excel workbooks are zip files, which can't be written front to back, so this one goes
+            # through a temporary file first
+            return FileResponse(
+                xlsx_file(self), as_attachment=True, filename=f'{fn_prefix}.xlsx',
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        else:
+            raise ValueError('Expected "json", "csv", or "xlsx"')
+        response.headers['Content-Disposition'] = f'attachment; filename="{fn_prefix}.{kind}"'
+        return response
+
     def serve(self, request: HttpRequest) -> HttpResponse:
-        if request.GET.get('update') == 'true':
+        if request.GET.get('download'):
+            return self._serve_download(request.GET['download'])
+        elif 'search' in request.GET:
+            return self._serve_json(request, lambda: self.search(request.GET['search']))
+        elif 'children' in request.GET:
+            return self._serve_json(request, lambda: self._children_json(request.GET['children']))
+        elif 'node' in request.GET:
+            return self._serve_json(request, lambda: self._node_json(request.GET['node']))
+        elif 'attribute' in request.GET:
+            return self._serve_json(request, lambda: self._attribute_json(request.GET['attribute']))
+        elif request.GET.get('update') == 'true' or request.GET.get('progress') == 'true':
             if request.user.is_staff or request.user.is_superuser:
-                if self.spreadsheet_id:
-                    return HttpResponseRedirect(self.update_nodes())
+                if request.GET.get('progress') == 'true':
+                    return self._serve_progress(request)
+                elif self.spreadsheet_id:
+                    CDEImportJob.enqueue(self, rebuild=request.GET.get('rebuild') == 'true')
+                    return HttpResponseRedirect(self.url)
                 else:
                     # No way to get here unless you have permissions and manually craft the request
                     return HttpResponse("No spreadsheet ID defined")
@@ -216,15 +953,194 @@ class CDEExplorerPage(Page):
             return super().serve(request)
 
 
+class CDEImportJob(models.Model):
+    '''A request to update a CDE explorer page from its spreadsheet.
+
+    Web requests merely queue these; the ``nist_help_cde_worker`` management command runs them so
+    that downloading and parsing spreadsheets never ties up a web worker.
+    '''
+    QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+    STATUS_CHOICES = ((QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed'))
+
+    page = models.ForeignKey(CDEExplorerPage, null=False, on_delete=models.CASCADE, related_name='import_jobs')
+    rebuild = models.BooleanField(null=False, default=False, help_text='Drop and re-create everything instead of syncing')
+    status = models.CharField(null=False, max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    phase = models.CharField(null=False, blank=True, max_length=50, help_text='What the job is doing right now')
+    percent = models.PositiveSmallIntegerField(null=False, default=0, help_text='How far along the job is')
+    requested = models.DateTimeField(null=False, auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # However many times someone clicks "Update", there's at most one job waiting per page
+            models.UniqueConstraint(
+                fields=['page'], condition=models.Q(status='queued'), name='content_one_queued_cde_import_per_page'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.page} import {self.status}'
+
+    def as_dict(self) -> dict:
+        return {
+            'status': self.status,
+            'phase': self.phase,
+            'percent': self.percent,
+            'requested': self.requested.isoformat(),
+            'started': self.started.isoformat() if self.started else None,
+            'finished': self.finished.isoformat() if self.finished else None,
+        }
+
+    @classmethod
+    def enqueue(cls, page: CDEExplorerPage, rebuild=False):
+        '''Queue an update of ``page``, collapsing into any update that's already waiting.'''
+        try:
+            with transaction.atomic():
+                job, created = cls.objects.get_or_create(page=page, status=cls.QUEUED, defaults={'rebuild': rebuild})
+        except IntegrityError:
+            # Someone else queued one at the same moment
+            job, created = cls.objects.get(page=page, status=cls.QUEUED), False
+        if rebuild and not job.rebuild:
+            cls.objects.filter(pk=job.pk, status=cls.QUEUED).update(rebuild=True)
+        return job
+
+    @classmethod
+    def recover(cls) -> int:
+        '''Fail the running jobs whose workers have gone away, returning how many there were.
+
+        A worker holds its page's advisory lock for as long as it runs a job, so a running job whose
+        page we can lock was orphaned, say by a crash. Without advisory locks (anything but PostgreSQL)
+        every running job looks orphaned, so run just one worker there.
+        '''
+        count = 0
+        for job in cls.objects.filter(status=cls.RUNNING).only('pk', 'page_id'):
+            if not _try_page_lock(job.page_id): continue
+            try:
+                count += cls.objects.filter(pk=job.pk, status=cls.RUNNING).update(
+                    status=cls.FAILED, phase='Interrupted', finished=timezone.now()
+                )
+            finally:
+                _release_page_lock(job.page_id)
+        return count
+
+    @classmethod
+    def claim(cls):
+        '''Claim the oldest queued job whose page isn't already being updated, or None if there isn't one.
+
+        The caller must call ``release`` on the job when it's done.
+        '''
+        with transaction.atomic():
+            for job in cls.objects.select_for_update(skip_locked=True).filter(status=cls.QUEUED).order_by('requested'):
+                if _try_page_lock(job.page_id):
+                    job.status, job.phase, job.started = cls.RUNNING, 'Starting', timezone.now()
+                    job.save()
+                    return job
+        return None
+
+    def report(self, phase: str, percent: int):
+        '''Record that this job is in ``phase`` and ``percent`` done.'''
+        self.phase, self.percent = phase, percent
+        CDEImportJob.objects.filter(pk=self.pk).update(phase=phase, percent=percent)
+
+    def run(self):
+        '''Run this claimed job, releasing its page when done.'''
+        try:
+            page = CDEExplorerPage.objects.get(pk=self.page_id)
+            page.update_nodes(rebuild=self.rebuild, progress=self.report)
+            self.status, self.phase, self.percent = CDEImportJob.SUCCEEDED, 'Done', 100
+        except Exception:
+            self.status = CDEImportJob.FAILED
+            _logger.exception('CDE import job %d failed', self.pk)
+        finally:
+            self.finished = timezone.now()
+            self.save()
+            _release_page_lock(self.page_id)
+
+
+def _try_page_lock(page_id: int) -> bool:
+    '''Try to take the advisory lock on the CDE explorer page with ``page_id``.
+
+    On databases other than PostgreSQL we have no advisory locks, so this always succeeds.
+    '''
+    if connection.vendor != 'postgresql': return True
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', [_advisory_lock_class, page_id])
+        return cursor.fetchone()[0]
+
+
+def _release_page_lock(page_id: int):
+    '''Release the advisory lock on the CDE explorer page with ``page_id``.'''
+    if connection.vendor != 'postgresql': return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_unlock(%s, %s)', [_advisory_lock_class, page_id])
+
+
 class CDEExplorerObject(models.Model):
     name = models.CharField(null=False, blank=False, max_length=200, help_text='Name of this object in a CDE hierarchy')
     description = models.TextField(null=False, blank=True, help_text='A nice long description of this object')
     stewardship = models.TextField(null=False, blank=True, help_text="Who's responsible for this object")
-    parent = models.ForeignKey('self', blank=True, null=True, on_delete=models.CASCADE, related_name='children')
+    parents = models.ManyToManyField(
+        'self', blank=True, symmetrical=False, through='CDEExplorerLink', through_fields=('child', 'parent'),
+        related_name='children'
+    )
     page = models.ForeignKey(CDEExplorerPage, blank=True, null=True, on_delete=models.SET_NULL, related_name='root_objects')
-    panels = [FieldPanel('name'), FieldPanel('description'), FieldPanel('parent'), FieldPanel('page')]
+    # No need to include these in panels since they're machine-updated
+    content_hash = models.CharField(null=False, blank=True, max_length=64, help_text='Hash of the imported content')
+    explorer = models.ForeignKey(
+        CDEExplorerPage, blank=True, null=True, on_delete=models.CASCADE, related_name='cde_objects',
+        help_text='Explorer page this object belongs to, however deep it is'
+    )
+    position = models.PositiveIntegerField(
+        null=False, blank=True, default=0, help_text="Place of this object in the preorder of its explorer's trees"
+    )
+    # Where an object sits comes only from importing, which keeps the closure, positions, and inherited
+    # attributes in step with it, so it's shown but not edited here
+    panels = [
+        FieldPanel('name'), FieldPanel('description'), FieldPanel('page', read_only=True),
+        FieldPanel('parents', read_only=True)
+    ]
+    class Meta:
+        indexes = [models.Index(fields=['explorer', 'position'], name='content_cde_object_order')]
     def __str__(self):
         return self.name
+    def descendants(self) -> models.QuerySet:
+        '''Get this object and all the objects beneath it in preorder with a single query.'''
+        return CDEExplorerObject.objects.filter(ancestor_rows__ancestor=self).order_by('ancestor_rows__position')
+    def ancestors(self) -> models.QuerySet:
+        '''Get all the objects above this one, nearest first, with a single query.'''
+        return CDEExplorerObject.objects.filter(
+            descendant_rows__descendant=self, descendant_rows__depth__gt=0
+        ).order_by('descendant_rows__depth', 'name')
+
+
+class CDEExplorerLink(models.Model):
+    '''A link from a CDE explorer object to one of its children; an object may have several parents.'''
+    parent = models.ForeignKey(CDEExplorerObject, null=False, on_delete=models.CASCADE, related_name='child_links')
+    child = models.ForeignKey(CDEExplorerObject, null=False, on_delete=models.CASCADE, related_name='parent_links')
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['parent', 'child'], name='content_unique_cde_link')]
+    def __str__(self):
+        return f'{self.parent} → {self.child}'
+
+
+class CDEExplorerClosure(models.Model):
+    '''A row in the closure of the CDE explorer object trees, relating an object to one beneath it.
+
+    Every object has a row relating it to itself at depth zero. Where a descendant can be reached
+    by several paths, ``depth`` is the shortest. The ``position`` is where the descendant comes in
+    the preorder of the ancestor's subtree, so a subtree comes out in order with a single query.
+    '''
+    ancestor = models.ForeignKey(CDEExplorerObject, null=False, on_delete=models.CASCADE, related_name='descendant_rows')
+    descendant = models.ForeignKey(CDEExplorerObject, null=False, on_delete=models.CASCADE, related_name='ancestor_rows')
+    depth = models.PositiveIntegerField(null=False, help_text='Levels from the ancestor down to the descendant')
+    position = models.PositiveIntegerField(null=False, help_text="Place of the descendant in the preorder of the ancestor's subtree")
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['ancestor', 'descendant'], name='content_unique_cde_closure')]
+        indexes = [
+            models.Index(fields=['ancestor', 'position'], name='content_cde_closure_subtree'),
+            models.Index(fields=['descendant', 'depth'], name='content_cde_closure_ancestors'),
+        ]
 
 
 class CDEExplorerAttribute(models.Model):
@@ -235,25 +1151,57 @@ class CDEExplorerAttribute(models.Model):
     data_type = models.CharField(null=False, blank=True, max_length=30, help_text='Kind of data')
     explanatory_note = models.TextField(null=False, blank=True, help_text='Note helping explain use of the CDE')
     inheritance = models.BooleanField(null=False, blank=False, default=False, help_text='Attribute inherits values')
+    # No need to include these in panels since they're machine-updated
+    content_hash = models.CharField(null=False, blank=True, max_length=64, help_text='Hash of the imported content')
+    anchor = models.CharField(
+        null=False, blank=True, max_length=320, db_index=True, help_text='HTML ID of this attribute, unique in its page'
+    )
+    position = models.PositiveIntegerField(
+        null=False, blank=False, default=0, help_text="Place of this attribute in its object's tab"
+    )
+    # Which object an attribute belongs to, its text, and whether it inherits feed its anchor, its
+    # content hash, and the inherited attributes, which only importing keeps in step, so they're
+    # shown but not edited here
     panels = [
-        FieldPanel('text'),
-        FieldPanel('obj'),
+        FieldPanel('text', read_only=True),
+        FieldPanel('obj', read_only=True),
         FieldPanel('definition'),
         FieldPanel('required'),
         FieldPanel('data_type'),
         FieldPanel('explanatory_note'),
-        FieldPanel('inheritance')
+        FieldPanel('inheritance', read_only=True)
     ]
+    class Meta:
+        indexes = [models.Index(fields=['obj', 'position'], name='content_cde_attribute_order')]
     def __str__(self):
         return self.text
 
 
+class CDEEffectiveAttribute(models.Model):
+    '''An attribute in effect for a CDE explorer object, either its own or one inherited from above.
+
+    The ``source`` is the object the attribute belongs to, which is the object itself at ``depth``
+    zero. The ``position`` orders an object's effective attributes: its own first, then the
+    inherited ones, nearest first.
+    '''
+    obj = models.ForeignKey(CDEExplorerObject, null=False, on_delete=models.CASCADE, related_name='effective_attributes')
+    attribute = models.ForeignKey(
+        CDEExplorerAttribute, null=False, on_delete=models.CASCADE, related_name='effective_rows'
+    )
+    source = models.ForeignKey(CDEExplorerObject, null=False, on_delete=models.CASCADE, related_name='passed_down')
+    depth = models.PositiveIntegerField(null=False, help_text='Levels from the source down to the object')
+    position = models.PositiveIntegerField(null=False, help_text="Place of the attribute among the object's effective ones")
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['obj', 'attribute'], name='content_unique_cde_effective_attribute')]
+        indexes = [models.Index(fields=['obj', 'position'], name='content_cde_effective_order')]
+
+
 class CDEPermissibleValue(models.Model):
     value = models.CharField(
         null=False, blank=False, max_length=200,
         help_text='An enumerated value allowed for a data element that uses permissible values'
     )
     attribute = models.ForeignKey(CDEExplorerAttribute, null=True,  on_delete=models.CASCADE, related_name='permissible_values')
-    panels = [FieldPanel('value'), FieldPanel('attribute')]
+    panels = [FieldPanel('value'), FieldPanel('attribute', read_only=True)]
     def __str__(self):
         return self.value
@@ -0,0 +1,141 @@
+# encoding: utf-8
+
+'''😌 NIST site content: machine-readable downloads of CDE explorer dictionaries.'''
+
+from django.db import connection, transaction
+import csv, itertools, json, openpyxl, operator, tempfile
+
+
+_chunk_size = 2000
+_columns = (
+    'Object', 'Parent', 'Description', 'Stewardship', 'Text', 'Definition', 'Requirement', 'Data Type',
+    'Explanatory Note', 'Permissible Values', 'Inheritance'
+)
+
+
+class _Groups:
+    '''Runs of consecutive ``rows`` that share their first column, taken in step with another sequence.'''
+    def __init__(self, rows):
+        self._groups = itertools.groupby(rows, key=operator.itemgetter(0))
+        self._advance()
+
+    def _advance(self):
+        self._key, self._rows = next(self._groups, (None, iter(())))
+
+    def take(self, key) -> list[tuple]:
+        '''Take the run for ``key`` if it's next, or give an empty list if there's none.'''
+        if self._key != key: return []
+        rows = list(self._rows)
+        self._advance()
+        return rows
+
+
+def records(page) -> dict:
+    '''Yield a record of each CDE explorer object of ``page`` in preorder.
+
+    Each record has the object's fields, the names of its parents, and its attributes, each with
+    its permissible values. Everything's read in one repeatable-read transaction, so an import
+    finishing partway through can't put the four cursors behind the records out of step.
+    '''
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == 'postgresql':
+            # Must come first in the transaction; SQLite's transactions are already serializable
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield from _records(page)
+
+
+def _records(page) -> dict:
+    '''Yield the records of ``page``'s objects from four cursors merged in step.
+
+    The cursors read objects, links, attributes, and permissible values all in the same order, so
+    only one object's attributes are ever held at once.
+    '''
+    from ._explorer import CDEExplorerLink, CDEExplorerAttribute, CDEPermissibleValue
+    objects = page.cde_objects.order_by('position', 'pk').values_list(
+        'pk', 'name', 'description', 'stewardship', 'page_id'
+    )
+    links = _Groups(CDEExplorerLink.objects.filter(child__explorer=page).order_by(
+        'child__position', 'child_id', 'parent__name'
+    ).values_list('child_id', 'parent__name').iterator(chunk_size=_chunk_size))
+    attributes = _Groups(CDEExplorerAttribute.objects.filter(obj__explorer=page).order_by(
+        'obj__position', 'obj_id', 'position', 'pk'
+    ).values_list(
+        'obj_id', 'pk', 'text', 'definition', 'required', 'data_type', 'explanatory_note', 'inheritance'
+    ).iterator(chunk_size=_chunk_size))
+    pvs = _Groups(CDEPermissibleValue.objects.filter(attribute__obj__explorer=page).order_by(
+        'attribute__obj__position', 'attribute__obj_id', 'attribute__position', 'attribute_id', 'pk'
+    ).values_list('attribute_id', 'value').iterator(chunk_size=_chunk_size))
+    for pk, name, description, stewardship, page_id in objects.iterator(chunk_size=_chunk_size):
+        yield {
+            'name': name,
+            'description': description,
+            'stewardship': stewardship,
+            'root': page_id is not None,
+            'parents': [parent for _, parent in links.take(pk)],
+            'attributes': [{
+                'text': text,
+                'definition': definition,
+                'required': required,
+                'data_type': data_type,
+                'explanatory_note': note,
+                'inheritance': inheritance,
+                'permissible_values': [value for _, value in pvs.take(attribute_id)],
+            } for _, attribute_id, text, definition, required, data_type, note, inheritance in attributes.take(pk)]
+        }
+
+
+def json_chunks(page):
+    '''Yield the JSON of the dictionary of ``page`` a record at a time.'''
+    yield '{"title": %s, "objects": [' % json.dumps(page.title)
+    for index, record in enumerate(records(page)):
+        yield (',' if index else '') + json.dumps(record)
+    yield ']}'
+
+
+def _rows(page):
+    '''Yield a row for each attribute of each object of ``page``, in the columns of an import spreadsheet.
+
+    Objects with no attributes get one row with the attribute columns empty. Parents are separated
+    by commas and permissible values by newlines, just as in the spreadsheets we import.
+    '''
+    yield _columns
+    for record in records(page):
+        obj = (record['name'], ', '.join(record['parents']), record['description'], record['stewardship'])
+        if not record['attributes']:
+            yield obj + ('',) * (len(_columns) - len(obj))
+        for attribute in record['attributes']:
+            yield obj + (
+                attribute['text'], attribute['definition'], attribute['required'], attribute['data_type'],
+                attribute['explanatory_note'], '\n'.join(attribute['permissible_values']), attribute['inheritance']
+            )
+
+
+class _Echo:
+    '''A file-like object that hands back whatever's written to it, so csv.writer can feed a stream.'''
+    def write(self, value: str) -> str:
+        return value
+
+
+def csv_chunks(page):
+    '''Yield the CSV of the dictionary of ``page`` a few rows at a time.'''
+    writer = csv.writer(_Echo())
+    for batch in itertools.zip_longest(*[_rows(page)] * 100):
+        yield ''.join(writer.writerow(row) for row in batch if row is not None)
+
+
+def xlsx_file(page):
+    '''Write the dictionary of ``page`` into an Excel workbook in a temporary file, returning it ready to read.
+
+    openpyxl's write-only mode streams the rows out to disk as they come, so the workbook never
+    sits in memory; the file goes away when closed.
+    '''
+    book = openpyxl.Workbook(write_only=True)
+    sheet = book.create_sheet('CDEs')
+    for row in _rows(page):
+        sheet.append(row)
+    f = tempfile.TemporaryFile()
+    book.save(f)
+    f.seek(0)
+    return f
@@ -0,0 +1,137 @@
+# encoding: utf-8
+
+'''😌 NIST site content: rendering CDE explorer trees to HTML.'''
+
+from ._tree import Tree, TreeNode, TreeAttribute
+from django.template.loader import render_to_string
+from django.utils.html import escape
+import itertools, operator
+
+
+_shared_note = (
+    "<p class='small'>(This object has several parents; its children appear under its first occurrence.)</p>"
+)
+_attributes_legend = (
+    "<h4>Attributes</h4><p class='small'>Attributes shown with <i class='text-danger bi bi-key-fill'></i> "
+    "are <em>required</em>, while those with <i class='text-secondary bi bi-arrow-down-up'></i> inherit "
+    "values from other objects.</p>"
+)
+
+
+def _or(value: str, fallback: str) -> str:
+    '''Escape ``value`` if there is one, or else give the ``fallback`` markup.'''
+    return escape(value) if value else fallback
+
+
+def _button(attribute: TreeAttribute) -> str:
+    '''Markup of the button that opens the canvas of ``attribute``.'''
+    required = attribute.required == 'Required'
+    style = 'danger' if required else 'secondary' if attribute.inheritance else 'primary'
+    icons = ("<i class='bi bi-key-fill'></i>" if required else '') + (
+        "<i class='bi bi-arrow-down-up'></i>" if attribute.inheritance else ''
+    )
+    anchor = escape(attribute.anchor)
+    return (
+        f"<a class='btn btn-sm btn-outline-{style}' data-bs-toggle='offcanvas' href='#{anchor}' role='button'"
+        f" data-bs-target='#{anchor}' aria-controls='{anchor}'>{icons} {escape(attribute.text)}</a>\n"
+    )
+
+
+def _canvas(attribute: TreeAttribute) -> str:
+    '''Markup of the off-canvas panel describing ``attribute``.'''
+    anchor, text = escape(attribute.anchor), escape(attribute.text)
+    if attribute.inheritance:
+        inheritance = 'If no values are specified, this attribute inherits values from other objects.'
+    else:
+        inheritance = 'This attribute does not inherit values from other objects.'
+    pvs = ''
+    if attribute.permissible_values:
+        pvs = "<h5>Permissible Values</h5><ul class='list-unstyled'>" + ''.join(
+            f'<li>{escape(pv)}</li>' for pv in attribute.permissible_values
+        ) + '</ul>'
+    return (
+        f"<div class='offcanvas offcanvas-end' tabindex='-1' id='{anchor}' aria-labelledby='{anchor}-label'>"
+        f"<div class='offcanvas-header'><h4 class='offcanvas-title' id='{anchor}-label'>{text}</h4>"
+        "<button type='button' class='btn-close' data-bs-dismiss='offcanvas' aria-label='Close'></button></div>"
+        f"<div class='offcanvas-body'><dl><dt>Element text</dt><dd><code>{text}</code></dd>"
+        f"<dt>Definition</dt><dd>{_or(attribute.definition, '<small>(No definition provided.)</small>')}</dd>"
+        f"<dt>Requirement</dt><dd>{_or(attribute.required, '<small>(Information not provided.)</small>')}</dd>"
+        f'<dt>Inheritance</dt><dd>{inheritance}</dd>'
+        f"<dt>Data Type</dt><dd>{_or(attribute.data_type, '<small>(Type information not available.)</small>')}</dd>"
+        '<dt>Explanatory Note</dt>'
+        f"<dd>{_or(attribute.explanatory_note, '<small>(No notes were given for this element.)</small>')}</dd>"
+        f'</dl>{pvs}</div></div>\n'
+    )
+
+
+def _node(node: TreeNode, shared: bool) -> str:
+    '''Markup opening the list item of ``node``, up to where its children would go.'''
+    name = escape(node.name)
+    parts = [
+        f"<li>{name}<div class='tree_view_annotation'><h3>{name}</h3>",
+        f'<p>{escape(node.description)}</p>' if node.description
+        else "<p class='small'>(No description of this object is available.)</p>",
+    ]
+    if shared: parts.append(_shared_note)
+    if node.stewardship: parts.append(f'<h3>Stewardship</h3><p>{escape(node.stewardship)}</p>')
+    if node.attributes:
+        parts.append(_attributes_legend)
+        parts.append("<p style='line-height: 2rem;'>")
+        parts.extend(_button(attribute) for attribute in node.attributes)
+        parts.append('</p>')
+    if node.inherited:
+        parts.append('<h4>Inherited Attributes</h4>')
+        for source, inherited in itertools.groupby(node.inherited, key=operator.itemgetter(0)):
+            parts.append(f"<p class='small'>From <em>{escape(source)}</em>:</p><p style='line-height: 2rem;'>")
+            parts.extend(_button(attribute) for _, attribute in inherited)
+            parts.append('</p>')
+    parts.append('</div>')
+    return ''.join(parts)
+
+
+def render_tree(tree: Tree) -> dict[str, str]:
+    '''Render the HTML of ``tree`` and of its attribute canvases in a single pass.
+
+    We walk the tree with a stack of our own rather than recursing, so no tree is too deep to render.
+
+    An object with several parents appears under each, but its children only under the first,
+    and its attributes get their canvases just once. Canvases come in the order their objects first
+    appear in the tree.
+    '''
+    markup, canvases, seen = ['<ul>\n'], [], set()
+    stack = ['</ul>\n'] + list(reversed(tree.roots))
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            markup.append(item)
+            continue
+        shared = item.pk in seen
+        markup.append(_node(item, shared))
+        if shared:
+            markup.append('</li>\n')
+            continue
+        seen.add(item.pk)
+        canvases.extend(_canvas(attribute) for attribute in item.attributes)
+        if item.children:
+            markup.append('<ul>\n')
+            stack.append('</ul></li>\n')
+            stack.extend(reversed(item.children))
+        else:
+            markup.append('</li>\n')
+    return {'tree': ''.join(markup), 'canvases': ''.join(canvases)}
+
+
+def render_tree_templates(tree: Tree) -> dict[str, str]:
+    '''Render the HTML of ``tree`` and of its attribute canvases with the recursive templates.
+
+    This is the old way, kept so the benchmarks can compare; deep enough trees run out of stack.
+    '''
+    context = {
+        'root_objects': tree.roots,
+        'cde_objects': tree.objects,
+        'cde_seen': set()  # Objects with several parents show their children under just the first
+    }
+    return {
+        'tree': render_to_string('content/cde-tree.html', context),
+        'canvases': render_to_string('content/cde-canvases.html', context)
+    }
@@ -0,0 +1,92 @@
+# encoding: utf-8
+
+'''😌 NIST site content: static, precompressed snapshots of CDE explorer pages.'''
+
+from ._tree import Tree
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+import brotli, gzip, json, posixpath
+
+
+_prefix = 'cde-explorer'
+
+
+def snapshot_path(page_id: int, generation: int, name: str) -> str:
+    '''Get the storage path of the snapshot file ``name`` of a page for its import ``generation``.'''
+    return posixpath.join(_prefix, str(page_id), str(generation), name)
+
+
+def tree_json(tree: Tree) -> dict:
+    '''Turn ``tree`` into plain JSON-ready data.
+
+    Since an object may have several parents, objects are listed once each by primary key, with
+    their children given by primary key too.
+    '''
+    return {
+        'roots': [node.pk for node in tree.roots],
+        'objects': {
+            node.pk: {
+                'name': node.name,
+                'description': node.description,
+                'stewardship': node.stewardship,
+                'children': [child.pk for child in node.children],
+                'inherited': [{'source': source, 'anchor': attribute.anchor} for source, attribute in node.inherited],
+                'attributes': [{
+                    'anchor': attribute.anchor,
+                    'text': attribute.text,
+                    'definition': attribute.definition,
+                    'required': attribute.required,
+                    'data_type': attribute.data_type,
+                    'explanatory_note': attribute.explanatory_note,
+                    'inheritance': attribute.inheritance,
+                    'permissible_values': attribute.permissible_values,
+                } for attribute in node.attributes]
+            } for node in tree.objects
+        }
+    }
+
+
+def _save(path: str, data: bytes):
+    '''Save ``data`` to ``path`` in storage along with gzip and brotli compressed copies.'''
+    for name, content in (
+        (path, data),
+        (f'{path}.gz', gzip.compress(data, compresslevel=9, mtime=0)),
+        (f'{path}.br', brotli.compress(data, quality=11)),
+    ):
+        # Storage won't overwrite, so clear out anything left over from an earlier attempt
+        default_storage.delete(name)
+        default_storage.save(name, ContentFile(content))
+
+
+def write_snapshot(page_id: int, generation: int, fragments: dict[str, str], tree: Tree):
+    '''Write the snapshot of a page for its import ``generation`` and remove all but the previous one.
+
+    The ``fragments`` are the rendered HTML of the page's tree and its attribute canvases; they go
+    alongside a JSON rendition of the tree, each with gzip and brotli compressed copies. Since the
+    names include the generation, they never change once written, so the front-end web server can
+    serve them straight from ``MEDIA_ROOT`` and let clients cache them forever. We keep the previous
+    generation so that anyone in the middle of loading it can still finish.
+    '''
+    for name, html in fragments.items():
+        _save(snapshot_path(page_id, generation, f'{name}.html'), html.encode('utf-8'))
+    _save(
+        snapshot_path(page_id, generation, 'tree.json'),
+        json.dumps(tree_json(tree), separators=(',', ':')).encode('utf-8')
+    )
+    page_dir = posixpath.join(_prefix, str(page_id))
+    for stale in default_storage.listdir(page_dir)[0]:
+        if stale.isdigit() and int(stale) < generation - 1:
+            stale_dir = posixpath.join(page_dir, stale)
+            for name in default_storage.listdir(stale_dir)[1]:
+                default_storage.delete(posixpath.join(stale_dir, name))
+
+
+def read_fragments(page_id: int, generation: int) -> dict[str, str]:
+    '''Read back the HTML fragments of a page's snapshot, or None if there isn't one.'''
+    fragments = {}
+    for name in ('tree', 'canvases'):
+        path = snapshot_path(page_id, generation, f'{name}.html')
+        if not default_storage.exists(path): return None
+        with default_storage.open(path, 'rb') as f:
+            fragments[name] = f.read().decode('utf-8')
+    return fragments
@@ -0,0 +1,93 @@
+# encoding: utf-8
+
+'''😌 NIST site content: where CDE spreadsheets come from, and a local cache of them.'''
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+import gdown, hashlib, os, re, shutil, tempfile
+
+
+class SpreadsheetSource:
+    '''Somewhere we can get CDE spreadsheets.'''
+    def fetch(self, spreadsheet_id: str, filename: str):
+        '''Write the spreadsheet identified by ``spreadsheet_id`` into the file ``filename``.'''
+        raise NotImplementedError()
+
+
+class GoogleDriveSource(SpreadsheetSource):
+    '''Spreadsheets in Google Drive, exported as Excel workbooks.'''
+    def fetch(self, spreadsheet_id: str, filename: str):
+        # use_cookies must be False to work on tumor.jpl.nasa.gov
+        fn = gdown.download(id=spreadsheet_id, output=filename, quiet=True, use_cookies=False, format='xlsx')
+        # gdown doesn't raise an exception on error, but returns None as the filename—even when we pass
+        # in the filename we want to use; see wkentaro/gdown#276
+        if fn is None:
+            raise ValueError('Error reading from gdown; check console log as gdown does not pass this info along')
+
+
+class DirectorySource(SpreadsheetSource):
+    '''Spreadsheets in a local directory, named by their IDs plus ``.xlsx``; handy for testing.'''
+    def __init__(self, directory: str = None):
+        self.directory = directory or settings.CDE_SPREADSHEET_DIRECTORY
+
+    def fetch(self, spreadsheet_id: str, filename: str):
+        shutil.copyfile(os.path.join(self.directory, f'{spreadsheet_id}.xlsx'), filename)
+
+
+def get_source() -> SpreadsheetSource:
+    '''Get the spreadsheet source named by the ``CDE_SPREADSHEET_SOURCE`` setting.'''
+    return import_string(settings.CDE_SPREADSHEET_SOURCE)()
+
+
+class SpreadsheetCache:
+    '''Spreadsheets we've fetched, kept on local disk and named by spreadsheet ID and checksum.
+
+    Fetching the same content twice leaves just one file. When the files together grow past
+    ``max_bytes``, the least-recently fetched ones get deleted.
+    '''
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        self.directory = directory or settings.CDE_SPREADSHEET_CACHE_DIR
+        self.max_bytes = settings.CDE_SPREADSHEET_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def fetch(self, source: SpreadsheetSource, spreadsheet_id: str) -> tuple[str, str]:
+        '''Fetch the spreadsheet ``spreadsheet_id`` from ``source`` into the cache.
+
+        Return the name of the cached file and the SHA-256 checksum of its content.
+        '''
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_fn = tempfile.mkstemp('.xlsx', prefix='.fetch-', dir=self.directory)
+        os.close(fd)
+        try:
+            source.fetch(spreadsheet_id, temp_fn)
+            checksum = hashlib.sha256()
+            with open(temp_fn, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    checksum.update(chunk)
+            checksum = checksum.hexdigest()
+            fn = os.path.join(self.directory, f'{re.sub(r"[^A-Za-z0-9_-]", "_", spreadsheet_id)}-{checksum}.xlsx')
+            if os.path.exists(fn):
+                os.utime(fn)  # Mark it as most-recently used
+            else:
+                os.replace(temp_fn, fn)
+        finally:
+            if os.path.exists(temp_fn):
+                os.remove(temp_fn)
+        self._evict(keep=fn)
+        return fn, checksum
+
+    def _evict(self, keep: str):
+        '''Delete least-recently used files until we're within our size, but never ``keep``.'''
+        entries = []
+        for entry in os.scandir(self.directory):
+            # Files starting with a dot are fetches still in progress
+            if entry.is_file() and entry.name.endswith('.xlsx') and not entry.name.startswith('.') and entry.path != keep:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries) + os.path.getsize(keep)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,88 @@
+# encoding: utf-8
+
+'''😌 NIST site content: CDE explorer trees assembled in memory for display.'''
+
+import dataclasses
+
+
+@dataclasses.dataclass
+class TreeAttribute:
+    '''An attribute of an object in a CDE explorer tree, with its permissible values.'''
+    pk: int
+    anchor: str
+    text: str
+    definition: str
+    required: str
+    data_type: str
+    explanatory_note: str
+    inheritance: bool
+    permissible_values: list[str] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class TreeNode:
+    '''An object in a CDE explorer tree, with its attributes and its children in order of name.
+
+    The ``inherited`` attributes are those passed down from objects above, each with the name of
+    the object it comes from, nearest first.
+    '''
+    pk: int
+    name: str
+    description: str
+    stewardship: str
+    root: bool
+    attributes: list[TreeAttribute] = dataclasses.field(default_factory=list)
+    inherited: list[tuple[str, TreeAttribute]] = dataclasses.field(default_factory=list)
+    children: list['TreeNode'] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class Tree:
+    '''The trees of a CDE explorer page: its roots, plus every distinct object in preorder.'''
+    roots: list[TreeNode]
+    objects: list[TreeNode]
+
+
+def build_tree(object_rows, attribute_rows, pv_rows, inherited_rows=()) -> Tree:
+    '''Assemble a tree from rows of values.
+
+    The ``object_rows`` have an object's fields plus the primary key of one of its parents in
+    ``parent_id``, so an object with several parents has several rows; they should come in
+    preorder. The ``attribute_rows`` name their object in ``obj_id`` and the ``pv_rows`` their
+    attribute in ``attribute_id``. The ``inherited_rows`` give the ``obj_id`` inheriting the
+    attribute ``attribute_id`` from the object named ``source_name``. Everything keeps the order
+    it comes in, so the tree and everything rendered from it come out the same every time.
+    '''
+    nodes, links = {}, []
+    for row in object_rows:
+        if row['pk'] not in nodes:
+            nodes[row['pk']] = TreeNode(
+                row['pk'], row['name'], row['description'], row['stewardship'], row['page_id'] is not None
+            )
+        if row['parent_id'] is not None:
+            links.append((row['parent_id'], row['pk']))
+    for parent, child in links:
+        # A parent outside this page can't be shown, so skip it
+        if parent in nodes: nodes[parent].children.append(nodes[child])
+    for node in nodes.values():
+        node.children.sort(key=lambda child: child.name)
+
+    attributes = {}
+    for row in attribute_rows:
+        node = nodes.get(row['obj_id'])
+        if node is None: continue
+        attribute = TreeAttribute(
+            row['pk'], row['anchor'], row['text'], row['definition'], row['required'], row['data_type'],
+            row['explanatory_note'], row['inheritance']
+        )
+        node.attributes.append(attribute)
+        attributes[attribute.pk] = attribute
+    for row in pv_rows:
+        attribute = attributes.get(row['attribute_id'])
+        if attribute is not None: attribute.permissible_values.append(row['value'])
+    for row in inherited_rows:
+        node, attribute = nodes.get(row['obj_id']), attributes.get(row['attribute_id'])
+        if node is not None and attribute is not None: node.inherited.append((row['source_name'], attribute))
+
+    objects = list(nodes.values())
+    return Tree(roots=[node for node in objects if node.root], objects=objects)
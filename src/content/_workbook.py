@@ -0,0 +1,67 @@
+# encoding: utf-8
+
+'''😌 NIST site content: lazy reading of CDE spreadsheets.'''
+
+import openpyxl, pandas, numpy
+
+
+class Workbook:
+    '''An Excel workbook whose tabs get read only when asked for.
+
+    Rather than reading every tab into memory up front like ``pandas.read_excel`` does, this opens
+    the workbook with openpyxl in read-only mode, which streams a tab's rows from the file only
+    when we ask for that tab. Tabs nobody asks for never get read at all, and nothing is kept of
+    a tab beyond what's returned.
+    '''
+    def __init__(self, filename: str):
+        self._book = openpyxl.load_workbook(filename, read_only=True, data_only=True, keep_links=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._book.sheetnames
+
+    @property
+    def names(self) -> list[str]:
+        '''Names of all the tabs in the workbook.'''
+        return self._book.sheetnames
+
+    def close(self):
+        self._book.close()
+
+    def columns(self, name: str, columns: tuple[str]) -> tuple[numpy.ndarray, numpy.ndarray]:
+        '''Read the ``columns`` of tab ``name``.
+
+        Return an object array of cell values, one row per spreadsheet row and one column for each
+        of ``columns``, plus an array of the spreadsheet's row number for each row. Blank rows are
+        skipped; blank cells come back as None. Raise ValueError if the tab lacks any of the ``columns``.
+        '''
+        sheet = self._book[name]
+        sheet.reset_dimensions()  # Some spreadsheet writers give wrong dimensions, which truncates reading
+        rows = sheet.iter_rows(values_only=True)
+        header = [None if cell is None else str(cell).strip() for cell in next(rows, ())]
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(f'Tab "{name}" is missing column(s) {", ".join(missing)}')
+        indexes = [header.index(column) for column in columns]
+        values, row_numbers = [], []
+        for row_number, row in enumerate(rows, start=2):
+            if any(cell is not None for cell in row):
+                row = row + (None,) * (len(header) - len(row))
+                values.append([row[index] for index in indexes])
+                row_numbers.append(row_number)
+        values = numpy.array(values, dtype=object).reshape(len(values), len(columns))
+        return values, numpy.array(row_numbers, dtype=int)
+
+    def frame(self, name: str, columns: tuple[str]) -> pandas.DataFrame:
+        '''Read the ``columns`` of tab ``name`` into a DataFrame.
+
+        The frame's index is the spreadsheet row number less two, just as ``pandas.read_excel`` would
+        number things if there were no blank rows. Raise ValueError if the tab lacks any of the ``columns``.
+        '''
+        values, row_numbers = self.columns(name, columns)
+        return pandas.DataFrame(values, columns=list(columns), index=row_numbers - 2)
@@ -0,0 +1,3 @@
+# encoding: utf-8
+
+'''😌 NIST site content: benchmarks of CDE explorer imports, run by ``nist_help_cde_benchmark``.'''
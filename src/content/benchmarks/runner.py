@@ -0,0 +1,102 @@
+# encoding: utf-8
+
+'''😌 NIST site content: timing each phase of a CDE explorer import.'''
+
+from .._render import render_tree, render_tree_templates
+from .._sources import DirectorySource, SpreadsheetCache
+from .._workbook import Workbook
+from ..models import CDEExplorerPage
+from .workbook import write_workbook
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from wagtail.models import Page
+import contextlib, logging, os, time, tempfile
+
+
+class _Rollback(Exception):
+    '''Raised to roll back everything a benchmark wrote to the database.'''
+
+
+class Timer:
+    '''Times named phases, keeping the best time and the query count of each over repeated runs.
+
+    A phase that runs out of stack is noted in ``failures`` instead.
+    '''
+    def __init__(self):
+        self.seconds, self.queries, self.failures = {}, {}, set()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            try:
+                yield
+            except RecursionError:
+                self.failures.add(name)
+                return
+            elapsed = time.perf_counter() - start
+        self.seconds[name] = min(elapsed, self.seconds.get(name, elapsed))
+        self.queries[name] = len(queries.captured_queries)
+
+
+def _run_once(timer: Timer, page: CDEExplorerPage, directory: str, spreadsheet_id: str):
+    '''Run through the phases of an import of ``spreadsheet_id`` into ``page`` once.'''
+    with timer.phase('download'):
+        filename, checksum = SpreadsheetCache(os.path.join(directory, 'cache')).fetch(
+            DirectorySource(directory), spreadsheet_id
+        )
+    with timer.phase('read'):
+        sheet = Workbook(filename)
+    with sheet:
+        with timer.phase('parse_structure'):
+            roots = page._parse_structure(sheet)
+    with timer.phase('instantiate'):
+        with transaction.atomic():
+            page._rebuild(roots)
+    with timer.phase('load_tree'):
+        tree = page.load_tree()
+    with timer.phase('render'):
+        render_tree(tree)
+    with timer.phase('render_templates'):
+        render_tree_templates(tree)
+    with timer.phase('sync_unchanged'):
+        with transaction.atomic():
+            page._sync(roots)
+    with timer.phase('delete'):
+        with transaction.atomic():
+            page._purge_tree()
+
+
+def benchmark(objects: int, attributes: int, values: int, fanout: int, repeat: int = 1) -> dict:
+    '''Benchmark importing a synthetic workbook of ``objects`` objects, taking the best of ``repeat`` runs.
+
+    Everything happens in a transaction that's rolled back at the end, so the database is left
+    as it was.
+    '''
+    timer = Timer()
+    with tempfile.TemporaryDirectory() as directory:
+        spreadsheet_id = f'synthetic-{objects}'
+        write_workbook(os.path.join(directory, f'{spreadsheet_id}.xlsx'), objects, attributes, values, fanout)
+        explorer_logger = logging.getLogger('content._explorer')
+        level = explorer_logger.level
+        explorer_logger.setLevel(logging.ERROR)
+        try:
+            with transaction.atomic():
+                page = CDEExplorerPage(title=f'Benchmark {objects}', slug=f'cde-benchmark-{objects}')
+                Page.get_first_root_node().add_child(instance=page)
+                for _ in range(repeat):
+                    page.update_log = ''
+                    _run_once(timer, page, directory, spreadsheet_id)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            explorer_logger.setLevel(level)
+    return {
+        'objects': objects,
+        'attributes': objects * attributes,
+        'permissible_values': objects * ((attributes + 1) // 2) * values,
+        'seconds': timer.seconds,
+        'queries': timer.queries,
+        'failures': sorted(timer.failures),
+    }
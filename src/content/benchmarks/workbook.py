@@ -0,0 +1,42 @@
+# encoding: utf-8
+
+'''😌 NIST site content: synthetic CDE workbooks for benchmarking.'''
+
+import openpyxl
+
+
+_attribute_header = (
+    'Text', 'Definition', 'Requirement', 'Data Type', 'Explanatory Note', 'Permissible Values', 'Inheritance'
+)
+
+
+def object_name(index: int) -> str:
+    '''Name of the synthetic object number ``index``, which is also the name of its tab.'''
+    return f'Object {index:05d}'
+
+
+def write_workbook(filename: str, objects: int, attributes: int = 10, values: int = 5, fanout: int = 5, roots: int = 1):
+    '''Write a synthetic CDE workbook to ``filename``.
+
+    It's laid out like the real ones: a "Structure" tab listing every object and its parent, then
+    one tab per object listing its attributes. There are ``objects`` objects in all, with the first
+    ``roots`` of them being roots and every other having ``fanout`` children until we run out.
+    Each object has ``attributes`` attributes, and every other attribute has ``values``
+    permissible values.
+    '''
+    book = openpyxl.Workbook(write_only=True)
+    structure = book.create_sheet('Structure')
+    structure.append(('Object', 'Parent', 'Description', 'Stewardship'))
+    for index in range(objects):
+        parent = None if index < roots else object_name((index - roots) // fanout)
+        structure.append((object_name(index), parent, f'Synthetic object number {index}', 'Benchmarking'))
+    for index in range(objects):
+        tab = book.create_sheet(object_name(index))
+        tab.append(_attribute_header)
+        for number in range(attributes):
+            pvs = '\n'.join(f'Value {value}' for value in range(values)) if number % 2 == 0 else None
+            tab.append((
+                f'attribute_{number}', f'Definition of attribute {number} of object {index}',
+                'Required' if number == 0 else 'Optional', 'string', None, pvs, number % 3 == 0
+            ))
+    book.save(filename)
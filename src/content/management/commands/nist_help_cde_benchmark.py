@@ -0,0 +1,50 @@
+# encoding: utf-8
+
+'''😌 NIST Help: benchmark CDE explorer imports.'''
+
+from content.benchmarks.runner import benchmark
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+import django, json, platform, sys, wagtail
+
+
+class Command(BaseCommand):
+    '''Time each phase of importing synthetic CDE workbooks of various sizes and report it as JSON.'''
+
+    help = 'Benchmark CDE explorer imports with synthetic workbooks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000],
+            help='Numbers of objects in each synthetic workbook [%(default)s]'
+        )
+        parser.add_argument('--attributes', type=int, default=10, help='Attributes per object [%(default)s]')
+        parser.add_argument('--values', type=int, default=5, help='Permissible values per enumerated attribute [%(default)s]')
+        parser.add_argument(
+            '--fanout', type=int, default=5, help='Children per object; 1 makes a single deep chain [%(default)s]'
+        )
+        parser.add_argument('--repeat', type=int, default=1, help='Runs per size, keeping the best time [%(default)s]')
+        parser.add_argument('--output', help='File to write the JSON report to; defaults to stdout')
+
+    def handle(self, *args, **options):
+        results = []
+        for size in options['sizes']:
+            self.stderr.write(f'Benchmarking {size} objects')
+            results.append(benchmark(
+                size, options['attributes'], options['values'], options['fanout'], options['repeat']
+            ))
+        report = {
+            'generated': timezone.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'wagtail': wagtail.__version__,
+            'database': connection.vendor,
+            'parameters': {key: options[key] for key in ('attributes', 'values', 'fanout', 'repeat')},
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
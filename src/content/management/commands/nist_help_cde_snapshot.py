@@ -0,0 +1,27 @@
+# encoding: utf-8
+
+'''😌 NIST Help: write static snapshots of CDE explorer pages.'''
+
+from content.models import CDEExplorerPage
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    '''Write the static, precompressed snapshot of CDE explorer pages without re-importing them.
+
+    Imports write snapshots on their own; this is for filling in storage after a move or a wipe.
+    '''
+
+    help = 'Write static snapshots of CDE explorer pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('pages', type=int, nargs='*', help='IDs of the pages to snapshot; defaults to all')
+
+    def handle(self, *args, **options):
+        pages = CDEExplorerPage.objects.all()
+        if options['pages']:
+            pages = pages.filter(pk__in=options['pages'])
+        for page in pages:
+            self.stdout.write(f'Writing snapshot of "{page}" (generation {page.cde_generation})')
+            page.publish_snapshot()
+        self.stdout.write("Job's done!")
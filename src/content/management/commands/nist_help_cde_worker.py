@@ -0,0 +1,45 @@
+# encoding: utf-8
+
+'''😌 NIST Help: run queued CDE spreadsheet imports.'''
+
+from content.models import CDEImportJob
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import time
+
+
+class Command(BaseCommand):
+    '''Run the CDE explorer imports that web requests have queued.'''
+
+    help = 'Run queued CDE explorer spreadsheet imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run whatever is queued, then exit')
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0, help='Seconds to wait between checks of the queue [%(default)s]'
+        )
+
+    def _drain(self) -> int:
+        '''Run queued jobs until there are none left to claim, returning how many ran.'''
+        count = 0
+        while True:
+            job = CDEImportJob.claim()
+            if job is None: return count
+            self.stdout.write(f'Running import of "{job.page}" (job {job.pk})')
+            job.run()
+            self.stdout.write(f'Import of "{job.page}" {job.status}')
+            count += 1
+
+    def handle(self, *args, **options):
+        self.stdout.write('Waiting for CDE imports')
+        try:
+            while True:
+                close_old_connections()
+                recovered = CDEImportJob.recover()
+                if recovered: self.stdout.write(f'Marked {recovered} interrupted import(s) as failed')
+                self._drain()
+                if options['once']: break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("Job's done!")
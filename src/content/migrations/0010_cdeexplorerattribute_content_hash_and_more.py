@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_alter_postmanapipage_postmanerator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cdeexplorerattribute',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='Hash of the imported content', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='cdeexplorerobject',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='Hash of the imported content', max_length=64),
+        ),
+    ]
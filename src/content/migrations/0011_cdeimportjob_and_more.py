@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_cdeexplorerattribute_content_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CDEImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rebuild', models.BooleanField(default=False, help_text='Drop and re-create everything instead of syncing')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('phase', models.CharField(blank=True, help_text='What the job is doing right now', max_length=50)),
+                ('percent', models.PositiveSmallIntegerField(default=0, help_text='How far along the job is')),
+                ('requested', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='content.cdeexplorerpage')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='cdeimportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('page',), name='content_one_queued_cde_import_per_page'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_cdeimportjob_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cdeexplorerpage',
+            name='last_import_checksum',
+            field=models.CharField(blank=True, help_text='Checksum of the spreadsheet last imported successfully', max_length=64),
+        ),
+    ]
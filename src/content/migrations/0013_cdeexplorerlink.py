@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_parents(apps, schema_editor):
+    '''Turn each object's single parent into a link.'''
+    CDEExplorerObject = apps.get_model('content', 'CDEExplorerObject')
+    CDEExplorerLink = apps.get_model('content', 'CDEExplorerLink')
+    pairs = CDEExplorerObject.objects.filter(parent__isnull=False).values_list('parent_id', 'pk')
+    CDEExplorerLink.objects.bulk_create(
+        [CDEExplorerLink(parent_id=parent, child_id=child) for parent, child in pairs.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_cdeexplorerpage_last_import_checksum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CDEExplorerLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('child', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parent_links', to='content.cdeexplorerobject')),
+                ('parent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='child_links', to='content.cdeexplorerobject')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cdeexplorerobject',
+            name='parents',
+            field=models.ManyToManyField(blank=True, related_name='children', through='content.CDEExplorerLink', through_fields=('child', 'parent'), to='content.cdeexplorerobject'),
+        ),
+        migrations.AddConstraint(
+            model_name='cdeexplorerlink',
+            constraint=models.UniqueConstraint(fields=('parent', 'child'), name='content_unique_cde_link'),
+        ),
+        migrations.RunPython(copy_parents, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='cdeexplorerobject',
+            name='parent',
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:22
+
+from django.db import migrations, models
+import django.db.models.deletion, collections
+
+
+def fill_closure(apps, schema_editor):
+    '''Give each existing object its explorer page and position, and work out the closure of each page's trees.'''
+    CDEExplorerObject = apps.get_model('content', 'CDEExplorerObject')
+    CDEExplorerLink = apps.get_model('content', 'CDEExplorerLink')
+    CDEExplorerClosure = apps.get_model('content', 'CDEExplorerClosure')
+    names = dict(CDEExplorerObject.objects.values_list('pk', 'name'))
+    children = collections.defaultdict(list)
+    for parent, child in CDEExplorerLink.objects.values_list('parent_id', 'child_id'):
+        children[parent].append(child)
+    for kids in children.values():
+        kids.sort(key=lambda pk: (names[pk], pk))
+
+    # Each object's descendants in preorder with their shortest depths, worked out bottom-up
+    orders = {}
+    for pk in names:
+        stack = [(pk, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in orders: continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children[node]) if child not in orders)
+                continue
+            order = {node: 0}
+            for child in children[node]:
+                for descendant, depth in orders[child].items():
+                    if descendant not in order or order[descendant] > depth + 1:
+                        order[descendant] = depth + 1
+            orders[node] = order
+    CDEExplorerClosure.objects.bulk_create([
+        CDEExplorerClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth, position=position)
+        for ancestor, order in orders.items() for position, (descendant, depth) in enumerate(order.items())
+    ], batch_size=1000)
+
+    roots = collections.defaultdict(list)
+    for pk, page in CDEExplorerObject.objects.filter(page__isnull=False).values_list('pk', 'page_id'):
+        roots[page].append(pk)
+    changed = []
+    for page, root_pks in roots.items():
+        positions = {}
+        for root in sorted(root_pks, key=lambda pk: (names[pk], pk)):
+            for descendant in orders[root]:
+                positions.setdefault(descendant, len(positions))
+        changed.extend(CDEExplorerObject(pk=pk, explorer_id=page, position=i) for pk, i in positions.items())
+    CDEExplorerObject.objects.bulk_update(changed, ['explorer', 'position'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_cdeexplorerlink'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CDEExplorerClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(help_text='Levels from the ancestor down to the descendant')),
+                ('position', models.PositiveIntegerField(help_text="Place of the descendant in the preorder of the ancestor's subtree")),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cdeexplorerobject',
+            name='explorer',
+            field=models.ForeignKey(blank=True, help_text='Explorer page this object belongs to, however deep it is', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cde_objects', to='content.cdeexplorerpage'),
+        ),
+        migrations.AddField(
+            model_name='cdeexplorerobject',
+            name='position',
+            field=models.PositiveIntegerField(blank=True, default=0, help_text="Place of this object in the preorder of its explorer's trees"),
+        ),
+        migrations.AddIndex(
+            model_name='cdeexplorerobject',
+            index=models.Index(fields=['explorer', 'position'], name='content_cde_object_order'),
+        ),
+        migrations.AddField(
+            model_name='cdeexplorerclosure',
+            name='ancestor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_rows', to='content.cdeexplorerobject'),
+        ),
+        migrations.AddField(
+            model_name='cdeexplorerclosure',
+            name='descendant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_rows', to='content.cdeexplorerobject'),
+        ),
+        migrations.AddIndex(
+            model_name='cdeexplorerclosure',
+            index=models.Index(fields=['ancestor', 'position'], name='content_cde_closure_subtree'),
+        ),
+        migrations.AddIndex(
+            model_name='cdeexplorerclosure',
+            index=models.Index(fields=['descendant', 'depth'], name='content_cde_closure_ancestors'),
+        ),
+        migrations.AddConstraint(
+            model_name='cdeexplorerclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='content_unique_cde_closure'),
+        ),
+        migrations.RunPython(fill_closure, migrations.RunPython.noop),
+    ]
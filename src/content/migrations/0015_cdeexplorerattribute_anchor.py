@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:24
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def fill_anchors(apps, schema_editor):
+    '''Give each existing attribute an HTML ID that's unique in its explorer page.'''
+    CDEExplorerAttribute = apps.get_model('content', 'CDEExplorerAttribute')
+    taken, changed = {}, []
+    rows = CDEExplorerAttribute.objects.order_by('obj__explorer_id', 'obj__position', 'obj_id', 'pk')
+    for pk, explorer, name, text in rows.values_list('pk', 'obj__explorer_id', 'obj__name', 'text').iterator():
+        anchors = taken.setdefault(explorer, set())
+        anchor = base = f'cde-{slugify(name or "")}-{slugify(text)}'
+        suffix = 1
+        while anchor in anchors:
+            suffix += 1
+            anchor = f'{base}-{suffix}'
+        anchors.add(anchor)
+        changed.append(CDEExplorerAttribute(pk=pk, anchor=anchor))
+    CDEExplorerAttribute.objects.bulk_update(changed, ['anchor'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_cdeexplorerclosure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cdeexplorerattribute',
+            name='anchor',
+            field=models.CharField(blank=True, db_index=True, help_text='HTML ID of this attribute, unique in its page', max_length=320),
+        ),
+        migrations.RunPython(fill_anchors, migrations.RunPython.noop),
+    ]
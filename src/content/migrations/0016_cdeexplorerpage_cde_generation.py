@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_cdeexplorerattribute_anchor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cdeexplorerpage',
+            name='cde_generation',
+            field=models.PositiveIntegerField(blank=True, default=0, help_text='Count of successful imports, for keying cached fragments'),
+        ),
+    ]
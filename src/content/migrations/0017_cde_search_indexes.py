@@ -0,0 +1,38 @@
+# encoding: utf-8
+#
+# Trigram indexes for searching CDE explorer pages. Only PostgreSQL has these, so other databases
+# skip them and fall back to scanning.
+
+from django.db import migrations
+
+
+_indexes = (
+    ('content_cde_object_name_trgm', 'content_cdeexplorerobject', 'name'),
+    ('content_cde_attribute_text_trgm', 'content_cdeexplorerattribute', 'text'),
+    ('content_cde_attribute_definition_trgm', 'content_cdeexplorerattribute', 'definition'),
+    ('content_cde_pv_value_trgm', 'content_cdepermissiblevalue', 'value'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql': return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in _indexes:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((LOWER({column})) gin_trgm_ops)')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql': return
+    for name, _, _ in _indexes:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_cdeexplorerpage_cde_generation'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+def fill_positions(apps, schema_editor):
+    '''Number each existing object's attributes in the order they were inserted, which was the tab's.'''
+    CDEExplorerAttribute = apps.get_model('content', 'CDEExplorerAttribute')
+    changed, last_obj, position = [], None, 0
+    for pk, obj in CDEExplorerAttribute.objects.order_by('obj_id', 'pk').values_list('pk', 'obj_id').iterator():
+        position = position + 1 if obj == last_obj else 0
+        last_obj = obj
+        changed.append(CDEExplorerAttribute(pk=pk, position=position))
+    CDEExplorerAttribute.objects.bulk_update(changed, ['position'], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0017_cde_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cdeexplorerattribute',
+            name='position',
+            field=models.PositiveIntegerField(default=0, help_text="Place of this attribute in its object's tab"),
+        ),
+        migrations.AddIndex(
+            model_name='cdeexplorerattribute',
+            index=models.Index(fields=['obj', 'position'], name='content_cde_attribute_order'),
+        ),
+        migrations.RunPython(fill_positions, migrations.RunPython.noop),
+    ]
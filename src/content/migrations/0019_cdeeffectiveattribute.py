@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion, collections
+
+
+def fill_effective_attributes(apps, schema_editor):
+    '''Resolve the inherited attributes of every existing object, as imports will from now on.'''
+    CDEExplorerObject = apps.get_model('content', 'CDEExplorerObject')
+    CDEExplorerAttribute = apps.get_model('content', 'CDEExplorerAttribute')
+    CDEExplorerClosure = apps.get_model('content', 'CDEExplorerClosure')
+    CDEEffectiveAttribute = apps.get_model('content', 'CDEEffectiveAttribute')
+    positions = dict(CDEExplorerObject.objects.values_list('pk', 'position'))
+    own, inheriting = collections.defaultdict(list), collections.defaultdict(list)
+    attr_rows = CDEExplorerAttribute.objects.filter(obj__isnull=False).order_by('position', 'pk')
+    for pk, obj_id, text, inheritance, position in attr_rows.values_list('pk', 'obj_id', 'text', 'inheritance', 'position'):
+        own[obj_id].append((pk, text))
+        if inheritance: inheriting[obj_id].append((pk, text, position))
+    inherited = collections.defaultdict(dict)
+    closure_rows = CDEExplorerClosure.objects.filter(ancestor_id__in=list(inheriting), depth__gt=0)
+    for ancestor, descendant, depth in closure_rows.values_list('ancestor_id', 'descendant_id', 'depth'):
+        candidates = inherited[descendant]
+        for pk, text, position in inheriting[ancestor]:
+            rank = (depth, positions[ancestor], position)
+            if text not in candidates or candidates[text][0] > rank: candidates[text] = (rank, pk, ancestor)
+    rows = []
+    for obj_id in positions:
+        attrs = own.get(obj_id, [])
+        rows.extend(
+            CDEEffectiveAttribute(obj_id=obj_id, attribute_id=pk, source_id=obj_id, depth=0, position=position)
+            for position, (pk, _) in enumerate(attrs)
+        )
+        texts = {text for _, text in attrs}
+        passed_down = sorted(candidate for text, candidate in inherited.get(obj_id, {}).items() if text not in texts)
+        rows.extend(
+            CDEEffectiveAttribute(obj_id=obj_id, attribute_id=pk, source_id=source, depth=depth, position=position)
+            for position, ((depth, _, _), pk, source) in enumerate(passed_down, len(attrs))
+        )
+    CDEEffectiveAttribute.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0018_cdeexplorerattribute_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CDEEffectiveAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(help_text='Levels from the source down to the object')),
+                ('position', models.PositiveIntegerField(help_text="Place of the attribute among the object's effective ones")),
+                ('attribute', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_rows', to='content.cdeexplorerattribute')),
+                ('obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_attributes', to='content.cdeexplorerobject')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='passed_down', to='content.cdeexplorerobject')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['obj', 'position'], name='content_cde_effective_order')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cdeeffectiveattribute',
+            constraint=models.UniqueConstraint(fields=('obj', 'attribute'), name='content_unique_cde_effective_attribute'),
+        ),
+        migrations.RunPython(fill_effective_attributes, migrations.RunPython.noop),
+    ]
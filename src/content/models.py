@@ -3,7 +3,10 @@
 '''📐💁 NIST Help: content models.'''
 
 
-from ._explorer import CDEExplorerPage, CDEExplorerObject, CDEExplorerAttribute, CDEPermissibleValue  # noqa: F401
+from ._explorer import (  # noqa: F401
+    CDEExplorerPage, CDEExplorerObject, CDEExplorerLink, CDEExplorerClosure, CDEExplorerAttribute, CDEEffectiveAttribute,
+    CDEPermissibleValue, CDEImportJob
+)
 from blocks import blocks
 from django.conf import settings
 from django.db import models
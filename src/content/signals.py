@@ -0,0 +1,9 @@
+# encoding: utf-8
+
+'''😌 NIST site content: signals.'''
+
+from django.dispatch import Signal
+
+
+# Sent by a ``CDEExplorerPage`` (as ``page``) once its CDEs have changed and its new import generation is in place
+cde_explorer_changed = Signal()
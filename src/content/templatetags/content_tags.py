@@ -3,29 +3,39 @@
 '''Content template tags.'''
 
 
-from ..models import CDEExplorerObject, CDEExplorerAttribute
+from .._tree import TreeNode, TreeAttribute
 from django import template
-from django.utils.text import slugify
 from wagtail.templatetags.wagtailcore_tags import richtext
+import itertools, operator
 
 register = template.Library()
 
 
-@register.inclusion_tag('content/cde-node.html', takes_context=False)
-def render_cde_node(node: CDEExplorerObject) -> dict:
+@register.inclusion_tag('content/cde-node.html', takes_context=True)
+def render_cde_node(context: template.Context, node: TreeNode) -> dict:
+    # An object with several parents appears under each, but its children only under the first
+    seen = context.get('cde_seen', set())
+    shared = node.pk in seen
+    seen.add(node.pk)
     return {
         'name': node.name,
         'description': node.description,
         'stewardship': node.stewardship,
-        'attributes': node.attributes.all(),
-        'children': node.children.all().order_by('name')
+        'attributes': node.attributes,
+        'inherited': [
+            (source, [attribute for _, attribute in group])
+            for source, group in itertools.groupby(node.inherited, key=operator.itemgetter(0))
+        ],
+        'children': [] if shared else node.children,
+        'shared': shared,
+        'cde_seen': seen
     }
 
 
 @register.inclusion_tag('content/cde-attribute-button.html', takes_context=False)
-def render_cde_attribute_button(attribute: CDEExplorerAttribute) -> dict:
+def render_cde_attribute_button(attribute: TreeAttribute) -> dict:
     return {
-        'id': f'cde-{slugify(attribute.obj.name)}-{slugify(attribute.text)}',
+        'id': attribute.anchor,
         'text': attribute.text,
         'required': attribute.required == 'Required',
         'inheritance': attribute.inheritance
@@ -33,22 +43,20 @@ def render_cde_attribute_button(attribute: CDEExplorerAttribute) -> dict:
 
 
 @register.inclusion_tag('content/cde-attribute-canvases.html', takes_context=False)
-def render_cde_attribute_canvases(node: CDEExplorerObject) -> dict:
-    return {
-        'attributes': node.attributes.all(),
-        'children': node.children.all()
-    }
+def render_cde_attribute_canvases(objects: list[TreeNode]) -> dict:
+    # Each distinct object gets its canvases once, no matter how many parents it has
+    return {'attributes': [attribute for obj in objects for attribute in obj.attributes]}
 
 
 @register.inclusion_tag('content/cde-attribute-canvas.html', takes_context=False)
-def render_cde_attribute_canvas(attribute: CDEExplorerAttribute) -> dict:
+def render_cde_attribute_canvas(attribute: TreeAttribute) -> dict:
     return {
-        'id': f'cde-{slugify(attribute.obj.name)}-{slugify(attribute.text)}',
+        'id': attribute.anchor,
         'text': attribute.text,
         'definition': attribute.definition,
         'required': attribute.required,
         'data_type': attribute.data_type,
         'note': attribute.explanatory_note,
-        'pvs': attribute.permissible_values.all(),
+        'pvs': attribute.permissible_values,
         'inheritance': attribute.inheritance
     }
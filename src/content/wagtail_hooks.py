@@ -2,7 +2,8 @@
 
 '''😌 NIST Site content: hooks for Wagtail.'''
 
-from .models import CDEPermissibleValue, CDEExplorerAttribute, CDEExplorerObject
+from .models import CDEPermissibleValue, CDEExplorerAttribute, CDEExplorerObject, CDEExplorerPage
+from wagtail import hooks
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup
 
@@ -36,3 +37,30 @@ class CDEGroup(SnippetViewSetGroup):
 
 
 register_snippet(CDEGroup)
+
+
+def _explorer_id(instance) -> int:
+    '''Find the primary key of the CDE explorer page that ``instance`` belongs to, or None if it's not a CDE.'''
+    if isinstance(instance, CDEPermissibleValue):
+        instance = instance.attribute
+    if isinstance(instance, CDEExplorerAttribute):
+        instance = instance.obj
+    return instance.explorer_id if isinstance(instance, CDEExplorerObject) else None
+
+
+def _next_generations(explorer_ids: set):
+    for page in CDEExplorerPage.objects.filter(pk__in=explorer_ids - {None}):
+        page.next_generation()
+
+
+@hooks.register('after_create_snippet')
+@hooks.register('after_edit_snippet')
+def refresh_edited_explorer(request, instance):
+    '''Show hand-edited CDEs on their explorer page rather than what was rendered before.'''
+    _next_generations({_explorer_id(instance)})
+
+
+@hooks.register('after_delete_snippet')
+def refresh_pruned_explorers(request, instances):
+    '''Drop hand-deleted CDEs from their explorer pages.'''
+    _next_generations({_explorer_id(instance) for instance in instances})
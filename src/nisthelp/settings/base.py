@@ -3,7 +3,7 @@
 '''📐💁 NIST Help site: base settings.'''
 
 from .ldap import *  # noqa: F401, F403
-import os, dj_database_url
+import os, dj_database_url, tempfile
 
 
 # Installed Applications
@@ -187,18 +187,32 @@ WAGTAIL_SITE_NAME = 'JPL NIST Help'
 # Search
 # ------
 #
+# Searches go to Elasticsearch through a circuit breaker (`search.backends`). After a few failures
+# in a row it opens, and for a while searches come from Wagtail's database backend (which keeps its
+# own index up to date) and index updates wait in the database until the cluster's back.
+#
 # 🔗 https://docs.wagtail.org/en/stable/reference/settings.html#wagtailsearch-backends
 
 WAGTAILSEARCH_BACKENDS = {
     'default': {
-        'BACKEND': 'wagtail.search.backends.elasticsearch7',
+        'BACKEND': 'search.backends',
+        'AUTO_UPDATE': True,
+        'PRIMARY': {
+            'BACKEND': 'wagtail.search.backends.elasticsearch7',
+            'ATOMIC_REBUILD': True,
+            'INDEX': 'wagtail',
+            'TIMEOUT': 5,
+            'OPTIONS': {},
+            'INDEX_SETTINGS': {},
+            'URLS': [os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200')]
+        },
+        'FALLBACK': 'fallback',
+        'FAILURE_THRESHOLD': int(os.getenv('SEARCH_FAILURE_THRESHOLD', '3')),
+        'RECOVERY_SECONDS': int(os.getenv('SEARCH_RECOVERY_SECONDS', '60')),
+    },
+    'fallback': {
+        'BACKEND': 'wagtail.search.backends.database',
         'AUTO_UPDATE': True,
-        'ATOMIC_REBUILD': True,
-        'INDEX': 'wagtail',
-        'TIMEOUT': 5,
-        'OPTIONS': {},
-        'INDEX_SETTINGS': {},
-        'URLS': [os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200')]
     }
 }
 
@@ -210,6 +224,65 @@ WAGTAILSEARCH_BACKENDS = {
 WAGTAILADMIN_BASE_URL = os.getenv('BASE_URL', 'https://labcas.jpl.nasa.gov/nist/help/')
 
 
+# Caching
+# -------
+#
+# File-based caches so that every web process, plus the CDE import worker, shares what's cached.
+# Once `default` fills up it culls entries at random, which is fine for search results but not for
+# the few keys that other things depend on: the search results generation, the search breaker's
+# state, the search hits flush epoch, and the pre-rendered CDE explorer pages for each page's current
+# import generation. Those go in `state` instead, whose limit is high enough never to be reached:
+# it holds a handful of keys plus two per CDE explorer page, since each import drops its old one.
+#
+# 🔗 https://docs.djangoproject.com/en/4.2/topics/cache/#filesystem-caching
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'nisthelp-cache')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '1000'))}
+    },
+    'state': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('STATE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'nisthelp-state')),
+        'OPTIONS': {'MAX_ENTRIES': 1000000}
+    }
+}
+
+
+# CDE Spreadsheets
+# ----------------
+#
+# Where CDE explorer pages get their spreadsheets, and where (and how much of them) we cache
+# locally. `CDE_SPREADSHEET_SOURCE` names a `content._sources.SpreadsheetSource` class; use
+# `content._sources.DirectorySource` with `CDE_SPREADSHEET_DIRECTORY` to stand in for Google Drive.
+
+CDE_SPREADSHEET_SOURCE = os.getenv('CDE_SPREADSHEET_SOURCE', 'content._sources.GoogleDriveSource')
+CDE_SPREADSHEET_DIRECTORY = os.getenv('CDE_SPREADSHEET_DIRECTORY', os.path.abspath(os.getcwd()))
+CDE_SPREADSHEET_CACHE_DIR = os.getenv(
+    'CDE_SPREADSHEET_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'nisthelp-cde-spreadsheets')
+)
+CDE_SPREADSHEET_CACHE_MAX_BYTES = int(os.getenv('CDE_SPREADSHEET_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+
+# Search Hits
+# -----------
+#
+# Searches are counted in memory and written to the database in batches every this many seconds,
+# plus whatever's left when a process exits. Run `nist_help_flush_search_hits` to flush sooner.
+
+SEARCH_HITS_FLUSH_INTERVAL = int(os.getenv('SEARCH_HITS_FLUSH_INTERVAL', '30'))
+
+
+# Search Results
+# --------------
+#
+# Each page of site search results is cached for this many seconds, or until any page is published
+# or unpublished, whichever comes first.
+
+SEARCH_RESULTS_CACHE_TIMEOUT = int(os.getenv('SEARCH_RESULTS_CACHE_TIMEOUT', '300'))
+
+
 # reCAPTChA
 #
 # 🔗 https://github.com/springload/wagtail-django-recaptcha
@@ -230,18 +303,3 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'False') == 'True'
 
 
-# Search
-# ------
-
-WAGTAILSEARCH_BACKENDS = {
-    'default': {
-        'BACKEND': 'wagtail.search.backends.elasticsearch7',
-        'AUTO_UPDATE': True,
-        'ATOMIC_REBUILD': True,
-        'INDEX': 'wagtail',
-        'TIMEOUT': 5,
-        'OPTIONS': {},
-        'INDEX_SETTINGS': {},
-        'URLS': [os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200')]
-    }
-}
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        from .results import invalidate
+        from content.signals import cde_explorer_changed
+        from wagtail.signals import page_published, page_unpublished
+        page_published.connect(invalidate, dispatch_uid='search.results.published')
+        page_unpublished.connect(invalidate, dispatch_uid='search.results.unpublished')
+        # Imports change CDE names without publishing anything, and suggestions include those
+        cde_explorer_changed.connect(invalidate, dispatch_uid='search.results.cde-explorer-changed')
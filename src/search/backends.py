@@ -0,0 +1,276 @@
+# encoding: utf-8
+
+'''😌 NIST Help search: a circuit breaker around the search cluster, with a database fallback.'''
+
+from .models import PendingIndexUpdate
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+from elasticsearch.exceptions import ConnectionError as ElasticsearchConnectionError, TransportError
+from wagtail.search.backends import get_search_backend, import_backend
+from wagtail.search.backends.base import BaseSearchBackend
+from wagtail.search.index import get_indexed_instance
+import collections, dataclasses, logging, threading, time
+
+
+_logger = logging.getLogger(__name__)
+_state_key = 'search.breaker.state'
+_probe_key = 'search.breaker.probe'
+_replay_key = 'search.breaker.replaying'
+
+
+def _is_outage(ex: Exception) -> bool:
+    '''Tell if ``ex`` means the cluster is down or struggling, rather than that we asked it something wrong.'''
+    if isinstance(ex, ElasticsearchConnectionError): return True
+    if isinstance(ex, TransportError):
+        return not isinstance(ex.status_code, int) or ex.status_code >= 500
+    return isinstance(ex, (ConnectionError, TimeoutError))
+
+
+@dataclasses.dataclass
+class BreakerState:
+    '''How the circuit breaker stands: consecutive failures, and when it opened, if it's open.'''
+    failures: int = 0
+    opened: float = None
+
+    @property
+    def status(self) -> str:
+        return 'closed' if self.opened is None else 'open'
+
+
+class Breaker:
+    '''A circuit breaker whose state is shared through the cache.'''
+    def __init__(self, threshold: int, recovery: int):
+        self.threshold, self.recovery = threshold, recovery
+
+    @staticmethod
+    def state() -> BreakerState:
+        return caches['state'].get(_state_key) or BreakerState()
+
+    def allows(self) -> bool:
+        '''Tell if we should try the cluster; once it's been open long enough, just one caller gets to.'''
+        state = self.state()
+        if state.opened is None: return True
+        if time.time() - state.opened < self.recovery: return False
+        return caches['state'].add(_probe_key, True, timeout=self.recovery)
+
+    def succeeded(self) -> bool:
+        '''Note that the cluster worked, returning True if that closed the breaker.'''
+        state = self.state()
+        if state.failures == 0 and state.opened is None: return False
+        caches['state'].set(_state_key, BreakerState(), timeout=None)
+        caches['state'].delete(_probe_key)
+        if state.opened is not None:
+            _logger.warning('Search cluster is back; closing the circuit breaker')
+            return True
+        return False
+
+    def failed(self):
+        '''Note that the cluster had an outage, opening the breaker if it's had too many or was just probed.'''
+        state = self.state()
+        state.failures += 1
+        if state.opened is not None or state.failures >= self.threshold:
+            if state.opened is None:
+                _logger.warning('Search cluster failed %d times in a row; opening the circuit breaker', state.failures)
+            state.opened = time.time()
+        caches['state'].set(_state_key, state, timeout=None)
+        caches['state'].delete(_probe_key)
+
+
+class _GuardedResults:
+    '''Search results from the cluster that fall back to the fallback backend's if the cluster fails.
+
+    Results are lazy, so it's only when they're counted, sliced into, or iterated that we find out
+    whether the cluster's up. Once it's failed, these results and any sliced from them stick with
+    the fallback, so that counting and then paging through them is just one failure.
+    '''
+    def __init__(self, backend: 'SearchBackend', results, fallback, outcome: dict = None):
+        self._backend, self._results, self._make_fallback = backend, results, fallback
+        self._outcome = {'failed': False} if outcome is None else outcome  # Shared with slices
+        self._fallback_results = None
+
+    def _fallback(self):
+        if self._fallback_results is None: self._fallback_results = self._make_fallback()
+        return self._fallback_results
+
+    def _derive(self, results, fallback) -> '_GuardedResults':
+        return _GuardedResults(self._backend, results, fallback, self._outcome)
+
+    def _active(self):
+        '''The results to use right now: the cluster's, unless it's failed for these or the breaker's open.'''
+        return self._fallback() if self._outcome['failed'] or self._backend.breaker.state().opened is not None else self._results
+
+    @property
+    def supports_facet(self) -> bool:
+        return self._active().supports_facet
+
+    def __getattr__(self, name):
+        # Anything else Wagtail reads off search results, like ``backend`` or ``query_compiler``
+        if name.startswith('_'): raise AttributeError(name)
+        return getattr(self._active(), name)
+
+    def _get(self, operation):
+        if self._outcome['failed'] or not self._backend.breaker.allows(): return operation(self._fallback())
+        try:
+            value = operation(self._results)
+        except Exception as ex:
+            if not _is_outage(ex): raise
+            _logger.exception('Search cluster failed; using the fallback backend')
+            self._outcome['failed'] = True
+            self._backend.breaker.failed()
+            return operation(self._fallback())
+        self._backend.recovered()
+        return value
+
+    def __getitem__(self, key):
+        if self._outcome['failed']: return self._fallback()[key]
+        if isinstance(key, slice): return self._derive(self._results[key], lambda: self._fallback()[key])
+        return self._get(lambda results: results[key])
+
+    def __iter__(self):
+        return iter(self._get(list))
+
+    def __len__(self):
+        return self._get(len)
+
+    def count(self):
+        return self._get(lambda results: results.count())
+
+    def facet(self, field_name):
+        return self._get(lambda results: results.facet(field_name))
+
+    def annotate_score(self, field_name):
+        if self._outcome['failed']: return self._fallback().annotate_score(field_name)
+        return self._derive(
+            self._results.annotate_score(field_name), lambda: self._fallback().annotate_score(field_name)
+        )
+
+    def __repr__(self):
+        return f'<Guarded {self._results!r}>'
+
+
+class SearchBackend(BaseSearchBackend):
+    '''A search backend that guards another with a circuit breaker and falls back to a third.'''
+    catch_indexing_errors = True
+
+    def __init__(self, params: dict):
+        super().__init__(params)
+        primary = dict(params['PRIMARY'])
+        self.primary = import_backend(primary.pop('BACKEND'))(primary)
+        self.fallback_name = params.get('FALLBACK', 'fallback')
+        self.breaker = Breaker(int(params.get('FAILURE_THRESHOLD', 3)), int(params.get('RECOVERY_SECONDS', 60)))
+        # Rebuilding the index with "update_index" goes straight to the cluster
+        self.rebuilder_class = self.primary.rebuilder_class
+
+    @property
+    def fallback(self) -> BaseSearchBackend:
+        return get_search_backend(self.fallback_name)
+
+    def get_index_for_model(self, model):
+        return self.primary.get_index_for_model(model)
+
+    def get_rebuilder(self):
+        return self.primary.get_rebuilder()
+
+    def reset_index(self):
+        self.primary.reset_index()
+
+    def add_type(self, model):
+        self.primary.add_type(model)
+
+    def refresh_index(self):
+        self._guard(self.primary.refresh_index)
+
+    def add(self, obj):
+        if not self._guard(lambda: self.primary.add(obj)): _queue([obj], PendingIndexUpdate.ADD)
+
+    def add_bulk(self, model, obj_list):
+        if not self._guard(lambda: self.primary.add_bulk(model, obj_list)): _queue(obj_list, PendingIndexUpdate.ADD)
+
+    def delete(self, obj):
+        if not self._guard(lambda: self.primary.delete(obj)): _queue([obj], PendingIndexUpdate.DELETE)
+
+    def search(self, *args, **kwargs):
+        return self._search('search', args, kwargs)
+
+    def autocomplete(self, *args, **kwargs):
+        return self._search('autocomplete', args, kwargs)
+
+    def _search(self, method: str, args, kwargs):
+        # Making the results doesn't reach the cluster yet; using them does, so that's what's guarded
+        def fallback():
+            return getattr(self.fallback, method)(*args, **kwargs)
+        return _GuardedResults(self, getattr(self.primary, method)(*args, **kwargs), fallback)
+
+    def _guard(self, operation) -> bool:
+        '''Run ``operation`` on the cluster if the breaker allows, returning whether it got done.'''
+        if not self.breaker.allows(): return False
+        try:
+            operation()
+        except Exception as ex:
+            if not _is_outage(ex): raise
+            _logger.exception('Search cluster failed')
+            self.breaker.failed()
+            return False
+        self.recovered()
+        return True
+
+    def recovered(self):
+        '''Note the cluster worked; if that closes the breaker, replay what was queued in the background.'''
+        if self.breaker.succeeded():
+            threading.Thread(target=_replay_in_background, args=(self,), name='search-replay', daemon=True).start()
+
+
+def _queue(objs, action: str):
+    '''Hold back ``action`` on each of ``objs`` until the cluster is back, replacing anything already held.'''
+    PendingIndexUpdate.objects.bulk_create(
+        [
+            PendingIndexUpdate(
+                content_type=ContentType.objects.get_for_model(obj), object_id=str(obj.pk), action=action
+            )
+            for obj in objs
+        ],
+        update_conflicts=True, unique_fields=['content_type', 'object_id'], update_fields=['action', 'queued']
+    )
+
+
+def replay(backend: SearchBackend) -> int:
+    '''Send the held-back index updates to ``backend``'s cluster, returning how many there were.
+
+    Objects that are gone by now get deleted from the index whatever was queued for them. Updates
+    queued while this runs stay queued for next time.
+    '''
+    started, count = timezone.now(), 0
+    for content_type_id in PendingIndexUpdate.objects.values_list('content_type_id', flat=True).distinct():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None: continue
+        pending = PendingIndexUpdate.objects.filter(content_type_id=content_type_id, queued__lte=started)
+        actions = dict(pending.values_list('object_id', 'action'))
+        to_add = [object_id for object_id, action in actions.items() if action == PendingIndexUpdate.ADD]
+        found = {str(pk): obj for pk, obj in model._default_manager.in_bulk(to_add).items()}
+        by_model = collections.defaultdict(list)
+        for obj in found.values():
+            indexed = get_indexed_instance(obj)
+            if indexed is not None: by_model[type(indexed)].append(indexed)
+        for indexed_model, objs in by_model.items():
+            backend.primary.add_bulk(indexed_model, objs)
+        for object_id in actions.keys() - found.keys():
+            backend.primary.delete(model(pk=object_id))
+        pending.delete()
+        count += len(actions)
+    return count
+
+
+def _replay_in_background(backend: SearchBackend):
+    '''Replay the held-back updates, unless another process is already at it.'''
+    if not caches['state'].add(_replay_key, True, timeout=600): return
+    try:
+        count = replay(backend)
+        _logger.warning('Replayed %d held-back search index updates', count)
+    except Exception as ex:
+        _logger.exception('Could not replay held-back search index updates')
+        if _is_outage(ex): backend.breaker.failed()
+    finally:
+        caches['state'].delete(_replay_key)
+        connection.close()
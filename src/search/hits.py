@@ -0,0 +1,126 @@
+# encoding: utf-8
+
+'''😌 NIST Help search: buffered recording of search hits.'''
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, models, transaction
+from django.utils import timezone
+from wagtail.search.models import Query, QueryDailyHits
+from wagtail.search.utils import normalise_query_string
+import atexit, collections, logging, threading, time
+
+
+_logger = logging.getLogger(__name__)
+_epoch_key = 'search.hits.flush-epoch'
+_poll_seconds = 5
+
+_lock = threading.Lock()
+_pending = collections.Counter()  # Hits by query string and date
+_flusher = None
+
+
+def record(query_string: str):
+    '''Count a hit on ``query_string`` for today, to be written at the next flush.
+
+    Hits are counted in memory; a background thread in each process flushes them every
+    ``SEARCH_HITS_FLUSH_INTERVAL`` seconds, and whatever's left when the process exits normally.
+    '''
+    query_string = normalise_query_string(query_string)
+    if not query_string: return
+    with _lock:
+        _pending[(query_string, timezone.now().date())] += 1
+    _start()
+
+
+def flush() -> int:
+    '''Write all the hits counted so far in this process to the database and return how many there were.
+
+    Each query gets its ``Query`` row if it doesn't have one yet, and then its daily hits go up by
+    however many it's had since the last flush, all in a few bulk statements. Should writing fail,
+    the hits go back in the buffer for next time.
+    '''
+    global _pending
+    with _lock:
+        hits, _pending = _pending, collections.Counter()
+    if not hits: return 0
+    try:
+        _write(hits)
+    except Exception:
+        _logger.exception('Could not flush %d search hits; will try again later', sum(hits.values()))
+        with _lock:
+            _pending.update(hits)
+        return 0
+    return sum(hits.values())
+
+
+def _write(hits: collections.Counter):
+    '''Add ``hits``, counted by query string and date, to the query and daily hits tables.'''
+    query_strings = {query_string for query_string, _ in hits}
+    with transaction.atomic():
+        Query.objects.bulk_create(
+            [Query(query_string=query_string) for query_string in query_strings], ignore_conflicts=True
+        )
+        # Locking the queries keeps other processes flushing the same ones from adding duplicate days
+        ids = dict(
+            Query.objects.select_for_update().filter(query_string__in=query_strings).order_by('pk')
+            .values_list('query_string', 'pk')
+        )
+        wanted = {(ids[query_string], date): count for (query_string, date), count in hits.items()}
+        existing = QueryDailyHits.objects.filter(
+            query_id__in=set(ids.values()), date__in={date for _, date in hits}
+        ).values_list('pk', 'query_id', 'date')
+        updates = []
+        for pk, query_id, date in existing:
+            count = wanted.pop((query_id, date), None)
+            if count is not None: updates.append(QueryDailyHits(pk=pk, hits=models.F('hits') + count))
+        QueryDailyHits.objects.bulk_update(updates, ['hits'])
+        QueryDailyHits.objects.bulk_create([
+            QueryDailyHits(query_id=query_id, date=date, hits=count) for (query_id, date), count in wanted.items()
+        ])
+
+
+def request_flush():
+    '''Ask every process to flush its hits at its next check.
+
+    The hits live in each web process, so we can't flush them from here; instead we bump a flush
+    epoch in the shared cache, which every process's flusher checks every few seconds.
+    '''
+    try:
+        caches['state'].incr(_epoch_key)
+    except ValueError:
+        caches['state'].set(_epoch_key, 1, timeout=None)
+
+
+def _epoch():
+    return caches['state'].get(_epoch_key, 0)
+
+
+def _run():
+    '''Flush whenever the interval's up or someone's asked, checking every few seconds, forever.'''
+    interval, epoch, last = getattr(settings, 'SEARCH_HITS_FLUSH_INTERVAL', 30), _epoch(), time.monotonic()
+    while True:
+        time.sleep(min(interval, _poll_seconds))
+        try:
+            current = _epoch()
+            if current != epoch or time.monotonic() - last >= interval:
+                epoch, last = current, time.monotonic()
+                # This thread lives forever, so drop its connection if it's gone bad or stale
+                close_old_connections()
+                try:
+                    flush()
+                finally:
+                    close_old_connections()
+        except Exception:
+            _logger.exception('Search hit flusher had trouble; carrying on')
+
+
+def _start():
+    '''Start this process's flusher thread and arrange a final flush at exit, once.'''
+    global _flusher
+    if _flusher is not None: return
+    with _lock:
+        if _flusher is not None: return
+        _flusher = threading.Thread(target=_run, name='search-hit-flusher', daemon=True)
+        _flusher.start()
+        atexit.register(flush)
@@ -0,0 +1,21 @@
+# encoding: utf-8
+
+'''😌 NIST Help: flush buffered search hits.'''
+
+from django.core.management.base import BaseCommand
+from search.hits import flush, request_flush
+
+
+class Command(BaseCommand):
+    '''Have every web process write the search hits it's been counting to the database.
+
+    Each process checks for the request every few seconds, so the hits show up shortly after this
+    returns rather than immediately.
+    '''
+
+    help = 'Flush the search hits buffered in every web process'
+
+    def handle(self, *args, **options):
+        request_flush()
+        flush()
+        self.stdout.write("Flush requested. Job's done!")
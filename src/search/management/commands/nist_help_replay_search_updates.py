@@ -0,0 +1,25 @@
+# encoding: utf-8
+
+'''😌 NIST Help: replay held-back search index updates.'''
+
+from django.core.management.base import BaseCommand, CommandError
+from search.backends import SearchBackend, replay
+from wagtail.search.backends import get_search_backend
+
+
+class Command(BaseCommand):
+    '''Send the index updates held back while the search cluster was down to the cluster.
+
+    They're replayed on their own once the circuit breaker closes; this is for doing it sooner,
+    or from cron in case a replay was interrupted.
+    '''
+
+    help = 'Replay search index updates held back while the search cluster was unavailable'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if not isinstance(backend, SearchBackend):
+            raise CommandError('The default search backend has no circuit breaker, so nothing gets held back')
+        self.stdout.write(f'Replayed {replay(backend)} updates')
+        backend.recovered()
+        self.stdout.write("Job's done!")
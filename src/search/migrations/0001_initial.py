@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingIndexUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(help_text='Primary key of the object', max_length=255)),
+                ('action', models.CharField(choices=[('add', 'Add or update'), ('delete', 'Delete')], help_text='What to do to the object in the index', max_length=6)),
+                ('queued', models.DateTimeField(auto_now=True, help_text='When this update was last held back')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pendingindexupdate',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='search_one_pending_update_per_object'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# encoding: utf-8
+
+'''😌 NIST Help search: models.'''
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class PendingIndexUpdate(models.Model):
+    '''An update to the search index held back while the search cluster was unavailable.
+
+    There's at most one per object: the latest thing that happened to it, which is all that
+    needs replaying once the cluster is back.
+    '''
+    ADD, DELETE = 'add', 'delete'
+    content_type = models.ForeignKey(ContentType, null=False, on_delete=models.CASCADE)
+    object_id = models.CharField(null=False, blank=False, max_length=255, help_text='Primary key of the object')
+    action = models.CharField(
+        null=False, blank=False, max_length=6, choices=((ADD, 'Add or update'), (DELETE, 'Delete')),
+        help_text='What to do to the object in the index'
+    )
+    queued = models.DateTimeField(null=False, auto_now=True, help_text='When this update was last held back')
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='search_one_pending_update_per_object')
+        ]
+    def __str__(self):
+        return f'{self.action} {self.content_type} {self.object_id}'
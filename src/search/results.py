@@ -0,0 +1,124 @@
+# encoding: utf-8
+
+'''😌 NIST Help search: cached site search results and suggestions.'''
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.paginator import Page as PaginatorPage, Paginator, EmptyPage
+from django.db.models.functions import Lower
+from wagtail.models import Page
+from wagtail.search.utils import normalise_query_string
+from urllib.parse import urlencode
+import dataclasses, hashlib
+
+
+_generation_key = 'search.results.generation'
+_per_page = 10
+_suggestion_limit = 5
+_suggestion_min_length = 2
+
+
+@dataclasses.dataclass
+class SearchResult:
+    '''What the search results page shows of a matching page.'''
+    title: str
+    url: str
+    search_description: str
+
+    def __str__(self):
+        return self.title
+
+
+def _key(query_string: str, part) -> str:
+    '''Make the cache key for ``part`` of what we know about ``query_string``: a page number or suggestions.'''
+    digest = hashlib.sha256(query_string.encode('utf-8')).hexdigest()
+    generation = caches['state'].get(_generation_key, 0)
+    return f'search.results.{generation}.{digest}.{part}'
+
+
+def _timeout() -> int:
+    return getattr(settings, 'SEARCH_RESULTS_CACHE_TIMEOUT', 300)
+
+
+def _search(query_string: str, number: int) -> dict:
+    '''Run the search for ``query_string`` and give its page ``number`` of results as primary keys.'''
+    paginator = Paginator(Page.objects.live().search(query_string), _per_page)
+    try:
+        results = paginator.page(number)
+    except EmptyPage:
+        results = paginator.page(paginator.num_pages)
+    return {'ids': [page.pk for page in results.object_list], 'count': paginator.count, 'number': results.number}
+
+
+def cached_search(query_string: str, number, request=None) -> PaginatorPage:
+    '''Get page ``number`` of results for the live pages matching ``query_string``, from the cache if we can.
+
+    Like a regular paginator's pages, a page number that's not a number gives the first page, and
+    one past the end gives the last. The results are ``SearchResult`` records with URLs relative
+    to the site of ``request``, if given.
+    '''
+    query_string = normalise_query_string(query_string)
+    try:
+        number = int(number)
+    except (TypeError, ValueError):
+        number = 1
+    found = cache.get(_key(query_string, number))
+    if found is None:
+        found = _search(query_string, number)
+        cache.set(_key(query_string, number), found, timeout=_timeout())
+        # Past-the-end numbers give the last page, which "Previous" and "Next" links will ask for by its own number
+        if found['number'] != number: cache.set(_key(query_string, found['number']), found, timeout=_timeout())
+    # Deferring makes them their specific types (which may have their own URL logic) without loading
+    # their specific fields, StreamFields and all, so it's still a single query
+    pages = Page.objects.live().specific(defer=True).in_bulk(found['ids'])
+    results = [
+        SearchResult(page.title, page.get_url(request=request), page.search_description)
+        for page in (pages[pk] for pk in found['ids'] if pk in pages)
+    ]
+    return PaginatorPage(results, found['number'], Paginator(range(found['count']), _per_page))
+
+
+def _suggestions(query_string: str, request) -> dict:
+    '''Find the live page titles and CDE names that start with ``query_string``.'''
+    from content.models import CDEExplorerObject, CDEExplorerPage
+    pages = Page.objects.live().specific(defer=True).autocomplete(query_string, fields=['title'])[:_suggestion_limit]
+    cdes = list(
+        CDEExplorerObject.objects.filter(explorer__live=True).annotate(lower_name=Lower('name'))
+        .filter(lower_name__startswith=query_string).order_by('name', 'explorer_id')
+        .values_list('name', 'explorer_id')[:_suggestion_limit]
+    )
+    explorers = CDEExplorerPage.objects.in_bulk({explorer_id for _, explorer_id in cdes})
+    return {
+        'query': query_string,
+        'pages': [{'title': page.title, 'url': page.get_url(request=request)} for page in pages],
+        'cdes': [{
+            'name': name,
+            'dictionary': explorers[explorer_id].title,
+            'url': f'{explorers[explorer_id].get_url(request=request)}?{urlencode({"find": name})}'
+        } for name, explorer_id in cdes],
+    }
+
+
+def suggest(query_string: str, request=None) -> dict:
+    '''Suggest a few pages and CDEs for ``query_string`` as someone types it.
+
+    Queries shorter than a couple of characters get no suggestions. The suggestions for each
+    query are cached like search results, so the common prefixes are answered straight from the
+    cache.
+    '''
+    query_string = normalise_query_string(query_string)
+    if len(query_string) < _suggestion_min_length: return {'query': query_string, 'pages': [], 'cdes': []}
+    key = _key(query_string, 'suggestions')
+    found = cache.get(key)
+    if found is None:
+        found = _suggestions(query_string, request)
+        cache.set(key, found, timeout=_timeout())
+    return found
+
+
+def invalidate(**kwargs):
+    '''Retire every cached search result; connected to page publication and CDE explorer changes.'''
+    try:
+        caches['state'].incr(_generation_key)
+    except ValueError:
+        caches['state'].set(_generation_key, 1, timeout=None)
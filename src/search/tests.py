@@ -0,0 +1,52 @@
+# encoding: utf-8
+
+'''😌 NIST Help search: tests.'''
+
+from .backends import Breaker
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+_caches = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'search-tests'},
+    'state': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'search-tests-state'},
+}
+
+
+def _backends(primary: dict) -> dict:
+    return {
+        'default': {'BACKEND': 'search.backends', 'PRIMARY': primary, 'FALLBACK': 'fallback', 'FAILURE_THRESHOLD': 3},
+        'fallback': {'BACKEND': 'wagtail.search.backends.database'},
+    }
+
+
+@override_settings(CACHES=_caches, WAGTAILSEARCH_BACKENDS=_backends({'BACKEND': 'wagtail.search.backends.database'}))
+class AdminPageSearchTest(TestCase):
+    '''Wagtail's admin page search must work through the circuit breaker, however it stands.'''
+    def setUp(self):
+        for alias in _caches: caches[alias].clear()
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.force_login(user)
+
+    def _search(self):
+        response = self.client.get(reverse('wagtailadmin_pages:search'), {'q': 'home'})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_closed(self):
+        self._search()
+        self.assertEqual(Breaker.state().status, 'closed')
+
+    def test_open(self):
+        Breaker(1, 60).failed()
+        self._search()
+        self.assertEqual(Breaker.state().status, 'open')
+
+    @override_settings(WAGTAILSEARCH_BACKENDS=_backends({
+        'BACKEND': 'wagtail.search.backends.elasticsearch7', 'URLS': ['http://localhost:9'], 'TIMEOUT': 1
+    }))
+    def test_cluster_down(self):
+        self._search()
+        self.assertGreater(Breaker.state().failures, 0)
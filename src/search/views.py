@@ -1,32 +1,26 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.template.response import TemplateResponse
+from django.utils.cache import patch_cache_control
 
 from wagtail.models import Page
-from wagtail.search.models import Query
+
+from .hits import record
+from .results import cached_search, suggest
 
 
 def search(request):
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
 
-    # Search
+    # Search, paginated; repeats come from the cache
     if search_query:
-        search_results = Page.objects.live().search(search_query)
-        query = Query.get(search_query)
+        search_results = cached_search(search_query, page, request)
 
-        # Record hit
-        query.add_hit()
+        # Record hit; it's written later along with others
+        record(search_query)
     else:
-        search_results = Page.objects.none()
-
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        search_results = Paginator(Page.objects.none(), 10).page(1)
 
     return TemplateResponse(
         request,
@@ -36,3 +30,10 @@ def search(request):
             "search_results": search_results,
         },
     )
+
+
+def autocomplete(request):
+    # Suggestions for searching as you type; browsers may reuse them for a minute
+    response = JsonResponse(suggest(request.GET.get("query", ""), request))
+    patch_cache_control(response, public=True, max_age=60)
+    return response
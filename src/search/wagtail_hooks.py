@@ -0,0 +1,34 @@
+# encoding: utf-8
+
+'''😌 NIST Help search: hooks for Wagtail.'''
+
+from .backends import Breaker
+from .models import PendingIndexUpdate
+from django.conf import settings
+from wagtail import hooks
+from wagtail.admin.ui.components import Component
+import datetime
+
+
+class SearchBreakerPanel(Component):
+    '''A dashboard panel telling how the search cluster's circuit breaker stands.'''
+    name = 'search_breaker'
+    template_name = 'search/breaker-panel.html'
+    order = 150
+
+    def get_context_data(self, parent_context):
+        state = Breaker.state()
+        opened = None if state.opened is None else datetime.datetime.fromtimestamp(state.opened, datetime.timezone.utc)
+        return {
+            'state': state,
+            'opened': opened,
+            'pending': PendingIndexUpdate.objects.count(),
+        }
+
+
+@hooks.register('construct_homepage_panels')
+def add_search_breaker_panel(request, panels: list):
+    '''Show the search breaker on the dashboard, if the default search backend has one.'''
+    backend = getattr(settings, 'WAGTAILSEARCH_BACKENDS', {}).get('default', {}).get('BACKEND')
+    if backend == 'search.backends' and request.user.is_superuser:
+        panels.append(SearchBreakerPanel())
@@ -55,7 +55,7 @@ bzip2 --decompress --stdout latest.sql.bz2 | psql --dbname=nisthelp --echo-error
 ./manage.sh collectstatic --no-input --clear --link
 
 # Add additional upgrade steps here:
-# TBD
+./manage.sh update_index --backend fallback
 
 # Final steps
 ./manage.sh clear_cache --all